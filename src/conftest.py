@@ -21,6 +21,15 @@ def collect_static(request):
         sys.stdout = oldstdout
 
 
+@pytest.fixture(autouse=True)
+def clear_caches(settings):
+    from django.core.cache import caches
+    from dino.pdns_api.cache import record_cache
+    for alias in settings.CACHES:
+        caches[alias].clear()
+    record_cache.local.clear()
+
+
 @pytest.fixture
 def base_client():
     return Client()
@@ -115,13 +124,17 @@ def db_zone():
 
 @pytest.fixture
 def mock_pdns_get_records(mocker):
-    rval = [
-        {'name': r[0], 'ttl': r[1], 'rtype': r[2], 'content': r[3]}
+    from dino.pdns_api.record import PDNSRecord
+    from dino.pdns_api.zonestore import ZoneStore
+    rval = ZoneStore.from_records('example.com.', [
+        PDNSRecord('example.com.', r[0], r[1], r[2], r[3])
         for r in [
             ('mail.example.com.', 300, 'A', '1.2.3.4'),
             ('example.com.', 300, 'MX', '0 mail.example.org.'),
-        ] + [(f'r{i}.example.com.', 300, 'A', '4.3.2.1') for i in range(500)]
-    ] + [{'name': 'example.com', 'ttl': 300, 'rtype': 'SOA', 'content': 'a.misconfigured.powerdns.server. hostmaster.example.com. 2019031306 10800 3600 604800 3601'}]
+        ] + [(f'r{i}.example.com.', 300, 'A', '4.3.2.1') for i in range(500)] + [
+            ('example.com', 300, 'SOA', 'a.misconfigured.powerdns.server. hostmaster.example.com. 2019031306 10800 3600 604800 3601'),
+        ]
+    ])
     return mocker.patch('dino.pdns_api.pdns.get_records', return_value=rval)
 
 
@@ -172,10 +185,11 @@ def broken_delete_record(mocker):
 
 @pytest.fixture
 def mock_pdns_get_zones(mocker):
-    rval = [
+    names = [
         'example.com.',
         'example.org.',
     ] + [f'example{i}.org' for i in range(500)]
+    rval = [{'name': name, 'serial': 1, 'kind': 'Native', 'masters': []} for name in names]
     return mocker.patch('dino.pdns_api.pdns.get_zones', return_value=rval)
 
 
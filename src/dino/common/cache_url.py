@@ -0,0 +1,75 @@
+from urllib.parse import parse_qsl, unquote, urlparse
+
+# django's default of 300 entries is culled quickly by per-user entries
+FILE_MAX_ENTRIES = 10000
+
+BACKENDS = {
+    'locmem': 'django.core.cache.backends.locmem.LocMemCache',
+    'file': 'django.core.cache.backends.filebased.FileBasedCache',
+    'db': 'django.core.cache.backends.db.DatabaseCache',
+    'memcached': 'django.core.cache.backends.memcached.MemcachedCache',
+    'pylibmc': 'django.core.cache.backends.memcached.PyLibMCCache',
+    'redis': 'django_redis.cache.RedisCache',
+    'dummy': 'django.core.cache.backends.dummy.DummyCache',
+}
+
+
+def _cast_option(value):
+    try:
+        return int(value)
+    except ValueError:
+        return value
+
+
+def parse_cache_url(url):
+    """
+    convert a URL to a django cache configuration, e.g.
+
+        locmem://                     => process-local memory
+        file:///opt/dino/cache        => directory shared by all processes
+        db://dino_cache               => database table (run createcachetable)
+        memcached://10.0.0.1:11211    => memcached server(s), comma-separated
+        redis://10.0.0.1:6379/0       => redis server, requires django-redis
+
+    ``timeout`` and ``key_prefix`` can be set in the query string, all other
+    query parameters are passed on as OPTIONS. File caches keep up to
+    FILE_MAX_ENTRIES entries, unless ``max_entries`` is given.
+    """
+    url = urlparse(url)
+
+    if url.scheme not in BACKENDS:
+        raise ValueError(f'unknown cache scheme "{url.scheme}", use one of: {", ".join(BACKENDS)}.')
+
+    config = {
+        'BACKEND': BACKENDS[url.scheme],
+    }
+
+    if url.scheme == 'file':
+        if url.netloc:
+            # file://var/cache would silently become /cache
+            raise ValueError(f'file cache URLs take an absolute path (file:///path), not "{url.netloc}{url.path}".')
+        config['LOCATION'] = unquote(url.path)
+    elif url.scheme in ('locmem', 'db'):
+        config['LOCATION'] = unquote(url.netloc + url.path)
+    elif url.scheme in ('memcached', 'pylibmc'):
+        config['LOCATION'] = url.netloc.split(',')
+    elif url.scheme == 'redis':
+        config['LOCATION'] = url._replace(query='').geturl()
+
+    options = {}
+
+    for key, value in parse_qsl(url.query):
+        if key == 'timeout':
+            config['TIMEOUT'] = int(value)
+        elif key == 'key_prefix':
+            config['KEY_PREFIX'] = value
+        else:
+            options[key.upper()] = _cast_option(value)
+
+    if url.scheme == 'file':
+        options.setdefault('MAX_ENTRIES', FILE_MAX_ENTRIES)
+
+    if options:
+        config['OPTIONS'] = options
+
+    return config
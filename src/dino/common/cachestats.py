@@ -0,0 +1,59 @@
+import logging
+import threading
+import time
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+
+class CacheStats():
+    """
+    Statistics of the caches kept in each process, logged every
+    CACHE_STATS_INTERVAL seconds by CacheStatsMiddleware. They are counted
+    per process, so they can't be asked for from the outside.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._sources = {}
+        self._last_logged = time.monotonic()
+
+    def register(self, name, stats):
+        """ register a cache by name, stats() returns a dict of its statistics """
+        self._sources[name] = stats
+
+    def collect(self):
+        return {name: stats() for name, stats in self._sources.items()}
+
+    def log(self):
+        for name, stats in self.collect().items():
+            logger.debug(f'{name}: ' + ', '.join(f'{key}={value}' for key, value in stats.items()))
+
+    def log_periodically(self):
+        """ log, unless done within the last CACHE_STATS_INTERVAL seconds """
+        if settings.CACHE_STATS_INTERVAL <= 0:
+            return
+
+        with self._lock:
+            now = time.monotonic()
+            if now - self._last_logged < settings.CACHE_STATS_INTERVAL:
+                return
+            self._last_logged = now
+
+        self.log()
+
+
+cache_stats = CacheStats()
+
+
+class CacheStatsMiddleware():
+    """ log the cache statistics of this process now and then """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        cache_stats.log_periodically()
+        return response
@@ -23,6 +23,8 @@ class Setting():
             return 'list'
         elif self.cast == bool:
             return 'boolean'
+        elif self.cast == int:
+            return 'integer'
         else:
             return str(self.cast)
 
@@ -32,6 +34,7 @@ class Config():
         str: lambda v: v,
         list: lambda v: v.split(','),
         bool: distutils.util.strtobool,
+        int: int,
     }
     CAST_NAMES = CASTS.keys()
 
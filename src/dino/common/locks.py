@@ -0,0 +1,46 @@
+import fcntl
+import hashlib
+import os
+
+from django.conf import settings
+
+
+class FileLock():
+    """
+    Lock shared by all processes on this machine (e.g. all uwsgi workers),
+    using flock() on a file in LOCK_DIR. Locks are not reentrant.
+
+        with FileLock('sync_zones'):
+            ...
+    """
+
+    def __init__(self, name):
+        # names may contain anything, e.g. zone names or cache keys
+        digest = hashlib.sha1(name.encode()).hexdigest()
+        self.path = os.path.join(settings.LOCK_DIR, f'{digest}.lock')
+        self._file = None
+
+    def acquire(self, blocking=True):
+        os.makedirs(settings.LOCK_DIR, exist_ok=True)
+        self._file = open(self.path, 'a')
+
+        try:
+            fcntl.flock(self._file, fcntl.LOCK_EX | (0 if blocking else fcntl.LOCK_NB))
+        except BlockingIOError:
+            self._file.close()
+            self._file = None
+            return False
+
+        return True
+
+    def release(self):
+        fcntl.flock(self._file, fcntl.LOCK_UN)
+        self._file.close()
+        self._file = None
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.release()
@@ -0,0 +1,166 @@
+import json
+
+from django.core.exceptions import ValidationError
+from django.core.paginator import InvalidPage, Page, Paginator
+from django.db.models import F, Q
+from django.utils.http import urlsafe_base64_decode, urlsafe_base64_encode
+from django.utils.translation import gettext_lazy as _
+
+
+class WindowPage(Page):
+    # number of pages to link before and after the current one
+    window = 3
+
+    @property
+    def nearby_pages(self):
+        """ page numbers around this one, instead of all of paginator.page_range """
+        first = max(self.number - self.window, 1)
+        last = min(self.number + self.window, self.paginator.num_pages)
+        return range(first, last + 1)
+
+
+class WindowPaginator(Paginator):
+    """
+    Paginator whose pages know their nearby_pages, so rendering the page
+    links of huge lists (e.g. zones with a million records) takes as long
+    as for small ones. Used by common/pagination.html.
+    """
+
+    def _get_page(self, *args, **kwargs):
+        return WindowPage(*args, **kwargs)
+
+
+class CursorPage():
+    """
+    a page of a CursorPaginator, linking to the pages before and after it by
+    cursors instead of page numbers. count is the (approximate) number of
+    all objects, if known.
+    """
+
+    def __init__(self, object_list, previous_cursor, next_cursor, count=None):
+        self.object_list = object_list
+        self.previous_cursor = previous_cursor
+        self.next_cursor = next_cursor
+        self.count = count
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_previous() or self.has_next()
+
+
+class CursorPaginator():
+    """
+    Keyset pagination of a queryset, ordered by `ordering` (a field name,
+    prefixed with "-" for descending order) and the unique `key` field.
+    Pages start right after the last object of the previous page (or end
+    right before the first one of the next page), which the database finds
+    using indexes, instead of counting and skipping all objects before the
+    page like Paginator does.
+
+    NULLs come first in ascending and last in descending order, whatever
+    the database does by default.
+    """
+
+    def __init__(self, queryset, ordering, per_page, key='pk', count=None):
+        self.queryset = queryset
+        self.field = ordering.lstrip('-')
+        self.descending = ordering.startswith('-')
+        self.per_page = per_page
+        self.key = key
+        self.count = count
+
+    def _fields(self):
+        return [self.field] if self.field == self.key else [self.field, self.key]
+
+    def _order_by(self, reverse):
+        ordering = []
+        for field in self._fields():
+            # the key is a tie breaker in ascending order
+            descending = (self.descending if field == self.field else False) != reverse
+            ordering.append(F(field).desc(nulls_last=True) if descending else F(field).asc(nulls_first=True))
+        return ordering
+
+    def _after(self, values, reverse):
+        """ condition for objects coming after values (of _fields()) """
+        condition = None
+
+        for i, (field, value) in reversed(list(enumerate(zip(self._fields(), values)))):
+            descending = (self.descending if field == self.field else False) != reverse
+
+            if value is None:
+                beyond = Q() if descending else Q(**{f'{field}__isnull': False})
+                equal = Q(**{f'{field}__isnull': True})
+            else:
+                beyond = Q(**{f'{field}__lt' if descending else f'{field}__gt': value})
+                if descending:
+                    beyond |= Q(**{f'{field}__isnull': True})
+                equal = Q(**{field: value})
+
+            if condition is None:
+                condition = beyond
+            elif beyond:
+                condition = beyond | (equal & condition)
+            else:
+                condition = equal & condition
+
+        return condition
+
+    def _cursor(self, obj):
+        values = []
+        for field in self._fields():
+            value = getattr(obj, field)
+            values.append(None if value is None else obj._meta.get_field(field).value_to_string(obj))
+        return urlsafe_base64_encode(json.dumps(values).encode())
+
+    def _decode(self, cursor):
+        try:
+            values = json.loads(urlsafe_base64_decode(cursor))
+            if not isinstance(values, list) or len(values) != len(self._fields()):
+                raise ValueError(cursor)
+
+            model = self.queryset.model
+            return [
+                None if value is None else model._meta.get_field(field).to_python(value)
+                for field, value in zip(self._fields(), values)
+            ]
+        except (ValueError, TypeError, ValidationError):
+            raise InvalidPage(_('Invalid page cursor.'))
+
+    def page(self, after=None, before=None):
+        """ the page after or before the given cursor, or the first page """
+        reverse = bool(before)
+        cursor = before or after
+        queryset = self.queryset.order_by(*self._order_by(reverse))
+
+        if cursor:
+            queryset = queryset.filter(self._after(self._decode(cursor), reverse))
+
+        objects = list(queryset[:self.per_page + 1])
+        more = len(objects) > self.per_page
+        objects = objects[:self.per_page]
+
+        if reverse:
+            objects.reverse()
+
+        # with a cursor, there is a page on the side it came from
+        if not objects:
+            previous_cursor = next_cursor = None
+        elif reverse:
+            previous_cursor = self._cursor(objects[0]) if more else None
+            next_cursor = self._cursor(objects[-1])
+        else:
+            previous_cursor = self._cursor(objects[0]) if cursor else None
+            next_cursor = self._cursor(objects[-1]) if more else None
+
+        return CursorPage(objects, previous_cursor, next_cursor, self.count)
@@ -8,13 +8,16 @@ def add_querystring(context, **kwargs):
     """
     Creates a URL (containing only the querystring [including "?"]) derived
     from the current URL's querystring, by updating it with the provided
-    keyword arguments.
+    keyword arguments. Arguments set to None are removed.
 
     Example (imagine URL is ``/abc/?gender=male&name=Tim``)::
 
         {% add_querystring "name"="Diego" "age"=20 %}
         ?name=Diego&gender=male&age=20
 
+        {% add_querystring gender=None %}
+        ?name=Tim
+
     by https://stackoverflow.com/a/46989096/2486196
     """
 
@@ -22,6 +25,9 @@ def add_querystring(context, **kwargs):
 
     # have to iterate over and not use .update as it's a QueryDict not a dict
     for k, v in kwargs.items():
-        updated[k] = v
+        if v is None:
+            updated.pop(k, None)
+        else:
+            updated[k] = v
 
     return '?{}'.format(updated.urlencode()) if updated else ''
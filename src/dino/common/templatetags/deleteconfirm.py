@@ -6,4 +6,7 @@ register = template.Library()
 
 @register.filter(name='sign')
 def sign(value):
+    if hasattr(value, 'as_dict'):
+        # e.g. PDNSRecord
+        value = value.as_dict()
     return signing.dumps(value)
@@ -0,0 +1,65 @@
+import pytest
+
+from ...cache_url import parse_cache_url
+
+
+@pytest.mark.parametrize('url,config', [
+    ('locmem://', {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': '',
+    }),
+    ('locmem://dino', {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'dino',
+    }),
+    ('file:///opt/dino/cache', {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': '/opt/dino/cache',
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    }),
+    ('db://dino_cache', {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'dino_cache',
+    }),
+    ('memcached://10.0.0.1:11211,10.0.0.2:11211', {
+        'BACKEND': 'django.core.cache.backends.memcached.MemcachedCache',
+        'LOCATION': ['10.0.0.1:11211', '10.0.0.2:11211'],
+    }),
+    ('pylibmc://10.0.0.1:11211', {
+        'BACKEND': 'django.core.cache.backends.memcached.PyLibMCCache',
+        'LOCATION': ['10.0.0.1:11211'],
+    }),
+    ('redis://:secret@10.0.0.1:6379/1?timeout=60', {
+        'BACKEND': 'django_redis.cache.RedisCache',
+        'LOCATION': 'redis://:secret@10.0.0.1:6379/1',
+        'TIMEOUT': 60,
+    }),
+    ('dummy://', {
+        'BACKEND': 'django.core.cache.backends.dummy.DummyCache',
+    }),
+])
+def test_parse_cache_url(url, config):
+    assert parse_cache_url(url) == config
+
+
+def test_parse_cache_url_options():
+    config = parse_cache_url('file:///opt/dino/cache?timeout=600&key_prefix=dino&max_entries=1000&cull_frequency=4&foo=bar')
+    assert config['TIMEOUT'] == 600
+    assert config['KEY_PREFIX'] == 'dino'
+    assert config['OPTIONS'] == {
+        'MAX_ENTRIES': 1000,
+        'CULL_FREQUENCY': 4,
+        'FOO': 'bar',
+    }
+
+
+def test_parse_cache_url_invalid():
+    with pytest.raises(ValueError) as excinfo:
+        parse_cache_url('mongodb://10.0.0.1')
+    assert 'mongodb' in str(excinfo.value)
+
+
+def test_parse_cache_url_relative_file():
+    with pytest.raises(ValueError) as excinfo:
+        parse_cache_url('file://var/cache/dino')
+    assert 'file:///path' in str(excinfo.value)
@@ -0,0 +1,49 @@
+import logging
+
+from dino.common.cachestats import CacheStats, CacheStatsMiddleware, cache_stats
+
+
+def test_cache_stats_log(caplog):
+    stats = CacheStats()
+    stats.register('test cache', lambda: {'hits': 1, 'misses': 2})
+
+    with caplog.at_level(logging.DEBUG, logger='dino.common.cachestats'):
+        stats.log()
+
+    assert 'test cache: hits=1, misses=2' in caplog.text
+
+
+def test_cache_stats_log_periodically(settings, mocker):
+    settings.CACHE_STATS_INTERVAL = 60
+    monotonic = mocker.patch('time.monotonic', return_value=100)
+    stats = CacheStats()
+    log = mocker.patch.object(stats, 'log')
+
+    monotonic.return_value = 159
+    stats.log_periodically()
+    log.assert_not_called()
+
+    monotonic.return_value = 160
+    stats.log_periodically()
+    stats.log_periodically()
+    log.assert_called_once()
+
+
+def test_cache_stats_disabled(settings, mocker):
+    settings.CACHE_STATS_INTERVAL = 0
+    stats = CacheStats()
+    stats._last_logged = -1000
+    log = mocker.patch.object(stats, 'log')
+    stats.log_periodically()
+    log.assert_not_called()
+
+
+def test_cache_stats_middleware(mocker):
+    log_periodically = mocker.patch.object(cache_stats, 'log_periodically')
+    middleware = CacheStatsMiddleware(lambda request: 'response')
+    assert middleware('request') == 'response'
+    log_periodically.assert_called_once()
+
+
+def test_cache_stats_local_zone_cache():
+    assert set(cache_stats.collect()['local zone cache']) >= {'hits', 'misses', 'resident'}
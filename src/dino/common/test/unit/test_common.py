@@ -64,6 +64,22 @@ def test_config_env_bool(monkeypatch, value, out):
     assert c.check_errors()
 
 
+def test_config_env_int(monkeypatch):
+    c = Config('DINO')
+    monkeypatch.setenv('DINO_BLA', '42')
+    assert c.get('BLA', 1, cast=int) == 42
+    assert c.check_errors()
+
+
+def test_config_env_int_invalid(monkeypatch, capsys):
+    c = Config('DINO')
+    monkeypatch.setenv('DINO_BLA', 'foo')
+    assert c.get('BLA', 1, cast=int) is None
+    assert not c.check_errors()
+    captured = capsys.readouterr()
+    assert '$DINO_BLA' in captured.err
+
+
 def test_config_env_bool_invalid(monkeypatch, capsys):
     c = Config('DINO')
     monkeypatch.setenv('DINO_BLA', 'foo')
@@ -129,6 +145,7 @@ def test_config_full(mock_config_open, monkeypatch):
     ((str, 'string')),
     ((list, 'list')),
     ((bool, 'boolean')),
+    ((int, 'integer')),
     ((set, "<class 'set'>")),
 ])
 def test_config_setting(cast, cast_str):
@@ -0,0 +1,40 @@
+import threading
+
+from dino.common.locks import FileLock
+
+
+def test_file_lock(settings, tmp_path):
+    settings.LOCK_DIR = str(tmp_path / 'locks')
+
+    with FileLock('sync_zones'):
+        assert not FileLock('sync_zones').acquire(blocking=False)
+        other = FileLock('other')
+        assert other.acquire(blocking=False)
+        other.release()
+
+    lock = FileLock('sync_zones')
+    assert lock.acquire(blocking=False)
+    lock.release()
+
+
+def test_file_lock_waits(settings, tmp_path):
+    settings.LOCK_DIR = str(tmp_path)
+    events = []
+
+    def worker():
+        with FileLock('zone'):
+            events.append('worker')
+
+    with FileLock('zone'):
+        thread = threading.Thread(target=worker)
+        thread.start()
+        thread.join(0.1)
+        events.append('main')
+
+    thread.join()
+    assert events == ['main', 'worker']
+
+
+def test_file_lock_name(settings, tmp_path):
+    settings.LOCK_DIR = str(tmp_path)
+    assert FileLock('../../etc/passwd').path.startswith(str(tmp_path))
@@ -0,0 +1,82 @@
+import pytest
+from django.core.paginator import InvalidPage
+
+from dino.common.paginator import CursorPaginator, WindowPaginator
+
+
+@pytest.mark.parametrize('number,nearby', [
+    (1, [1, 2, 3, 4]),
+    (5, [2, 3, 4, 5, 6, 7, 8]),
+    (10, [7, 8, 9, 10]),
+])
+def test_window_paginator(number, nearby):
+    paginator = WindowPaginator(range(100), 10)
+    assert list(paginator.page(number).nearby_pages) == nearby
+
+
+def test_window_paginator_single_page():
+    assert list(WindowPaginator([], 10).page(1).nearby_pages) == [1]
+
+
+@pytest.fixture
+def zones(db):
+    from dino.synczones.models import Zone
+    for i in range(23):
+        Zone.objects.create(
+            name=f'zone{i:02}.example.',
+            serial=None if i % 5 == 0 else i % 4,
+            kind=['Native', 'Master', 'Slave'][i % 3],
+        )
+    return Zone.objects.all()
+
+
+def walk(paginator):
+    """ names of all pages, following next cursors, then previous cursors back """
+    pages = [paginator.page()]
+    while pages[-1].has_next():
+        pages.append(paginator.page(after=pages[-1].next_cursor))
+
+    back = [pages[-1]]
+    while back[-1].has_previous():
+        back.append(paginator.page(before=back[-1].previous_cursor))
+
+    forward_names = [[z.name for z in page] for page in pages]
+    backward_names = [[z.name for z in page] for page in reversed(back)]
+    return forward_names, backward_names
+
+
+def expected(zones, ordering):
+    field = ordering.lstrip('-')
+    descending = ordering.startswith('-')
+    # None first ascending, last descending, names ascending within
+    zones = sorted(zones, key=lambda z: z.name)
+    with_value = sorted((z for z in zones if getattr(z, field) is not None), key=lambda z: getattr(z, field), reverse=descending)
+    without_value = [z for z in zones if getattr(z, field) is None]
+    return [z.name for z in (with_value + without_value if descending else without_value + with_value)]
+
+
+@pytest.mark.parametrize('ordering', ['name', '-name', 'serial', '-serial', 'kind', '-kind'])
+def test_cursor_paginator(zones, ordering):
+    forward, backward = walk(CursorPaginator(zones, ordering, 5, key='name'))
+    assert [len(page) for page in forward] == [5, 5, 5, 5, 3]
+    assert sum(forward, []) == expected(zones, ordering)
+    assert backward == forward
+
+
+def test_cursor_paginator_single_page(zones):
+    page = CursorPaginator(zones, 'name', 50, key='name').page()
+    assert len(page) == 23
+    assert not page.has_other_pages()
+
+
+def test_cursor_paginator_empty(db):
+    from dino.synczones.models import Zone
+    page = CursorPaginator(Zone.objects.all(), 'name', 5, key='name').page()
+    assert list(page) == []
+    assert not page.has_other_pages()
+
+
+@pytest.mark.parametrize('cursor', ['x', 'bm90IGpzb24', 'WzEsIDIsIDNd', 'WyJ4IiwgInkiXQ'])
+def test_cursor_paginator_invalid(zones, cursor):
+    with pytest.raises(InvalidPage):
+        CursorPaginator(zones, 'serial', 5, key='name').page(after=cursor)
@@ -1,7 +1,18 @@
+import contextlib
+import functools
+import re
+import string
+
 import idna
 import powerdns
-from django.conf import settings
-from powerdns.exceptions import PDNSError  # noqa
+from django.utils.functional import cached_property
+from powerdns.exceptions import PDNSError
+
+from .cache import record_cache, single_flight
+from .client import get_client, get_server_info
+from .record import PDNSRecord
+from .signals import records_changed, records_fetched
+from .zonestore import ZoneStore
 
 
 class PDNSNotFoundException(LookupError):
@@ -15,41 +26,107 @@ idna.idnadata.codepoint_classes['PVALID'] = tuple(
 )
 
 
+# number of encoded and decoded names to remember, each
+NAME_CACHE_SIZE = 65536
+
+# labels idna leaves as they are: lowercase ASCII, not starting or ending with
+# a hyphen. Names containing "--" (e.g. "xn--") are left to idna.
+PLAIN_LABEL_RE = re.compile(r'^[a-z0-9_](?:[a-z0-9_-]{0,61}[a-z0-9_])?\Z')
+
+
+def _is_plain_name(name):
+    return (
+        len(name) <= 253 and
+        '--' not in name and
+        all(PLAIN_LABEL_RE.match(label) for label in name.rstrip('.').split('.'))
+    )
+
+
+def _encode(name):
+    return name if _is_plain_name(name) else idna.encode(name).decode('ascii')
+
+
+def _decode(name):
+    return name if _is_plain_name(name) else idna.decode(name)
+
+
+@functools.lru_cache(maxsize=NAME_CACHE_SIZE)
+def _encode_name(name):
+    if name.startswith('*.'):
+        return '*.' + _encode(name[2:])
+    else:
+        return _encode(name)
+
+
+@functools.lru_cache(maxsize=NAME_CACHE_SIZE)
+def _decode_name(name):
+    if name.startswith('*.'):
+        return '*.' + _decode(name[2:])
+    else:
+        return _decode(name)
+
+
 class pdns():
     def __init__(self):
-        api_client = powerdns.PDNSApiClient(
-            api_endpoint=settings.PDNS_APIURL,
-            api_key=settings.PDNS_APIKEY
-        )
-        self.api = powerdns.PDNSEndpoint(api_client)
+        self.api_client = get_client()
 
     @classmethod
     def _encode_name(cls, name):
         """ convert a record to punnycode format """
         assert isinstance(name, str)
-
-        if name.startswith('*.'):
-            return '*.' + idna.encode(name[2:]).decode('ascii')
-        else:
-            return idna.encode(name).decode('ascii')
+        return _encode_name(name)
 
     @classmethod
     def _decode_name(cls, name):
         """ convert a record from punnycode format """
         assert isinstance(name, str)
+        return _decode_name(name)
 
-        if name.startswith('*.'):
-            return '*.' + idna.decode(name[2:])
-        else:
-            return idna.decode(name)
-
-    @property
+    @cached_property
     def _server(self):
-        return self.api.servers[0]
+        return powerdns.interface.PDNSServer(self.api_client, get_server_info())
+
+    ZONE_ID_CHARS = frozenset(string.ascii_letters + string.digits + '.-')
+
+    @classmethod
+    def _zone_id(cls, name):
+        """ convert an encoded zone name to its PowerDNS API id, like apiZoneNameToId() does """
+        zone_id = ''.join(
+            c if c in cls.ZONE_ID_CHARS else f'={ord(c):02X}'
+            for c in name
+        )
+
+        if not zone_id.endswith('.'):
+            zone_id += '.'
+        if zone_id == '.':
+            zone_id = '=2E'
+
+        return zone_id
+
+    def _zone(self, name):
+        """ get a handle for the given encoded zone name, without listing all zones """
+        zone = powerdns.interface.PDNSZone(self.api_client, self._server, {'name': name})
+        zone.url = f'{self._server.url}/zones/{self._zone_id(name)}'
+        return zone
+
+    @contextlib.contextmanager
+    def _raise_not_found(self):
+        try:
+            yield
+        except PDNSError as e:
+            if e.status_code == 404:
+                raise PDNSNotFoundException() from e
+            raise
 
     def get_zones(self):
+        """ get all zones along with their serial, kind and masters """
         return [
-            self._decode_name(z.name)
+            {
+                'name': self._decode_name(z.name),
+                'serial': z._api_data.get('serial'),
+                'kind': z._api_data.get('kind', ''),
+                'masters': z._api_data.get('masters', []),
+            }
             for z in self._server.zones
         ]
 
@@ -63,6 +140,8 @@ class pdns():
     def delete_zone(self, name):
         name = self._encode_name(name)
         self._server.delete_zone(name)
+        record_cache.invalidate(name)
+        single_flight.forget(name)
 
     def _encode_content(self, rtype, content):
         """ convert a record to PowerDNS format """
@@ -85,66 +164,137 @@ class pdns():
 
         return content
 
+    def _parse_rrsets(self, zone_name, rrsets):
+        """ turn the rrsets of a zone as returned by the API into single, enabled records """
+        # skips the argument handling of PDNSRecord(), which takes about as
+        # long as parsing a record.
+        new = tuple.__new__
+
+        for rrset in rrsets:
+            name = self._decode_name(rrset['name'])
+            rtype = rrset['type']
+
+            ttl = rrset['ttl']
+
+            for record in rrset['records']:
+                # disabled records are not served, so they are not shown either
+                if not record.get('disabled'):
+                    yield new(PDNSRecord, (zone_name, name, ttl, rtype, self._decode_content(rtype, record['content'])))
+
+    def _get_zone_details(self, zone, params=None):
+        zone = self._zone(self._encode_name(zone))
+        with self._raise_not_found():
+            return zone._get(zone.url, params=params)
+
+    def get_serial(self, zone):
+        return single_flight.do(
+            (self._encode_name(zone), 'serial'),
+            lambda: self._get_zone_details(zone, {'rrsets': 'false'})['serial'],
+        )
+
     def get_all_records(self, zone):
-        zone = self._encode_name(zone)
-        zone = self._server.get_zone(zone)
-        if zone is None:
-            raise PDNSNotFoundException()
-        axfr = zone._get(zone.url + '/export')['zone'].strip()
-        lines = [r.split('\t') for r in axfr.split('\n')]
-        if lines and len(lines[0]) == 5:
-            # https://github.com/Uberspace/dino/issues/83
-            return (
-                {
-                    'zone': self._decode_name(zone.name),
-                    'name': self._decode_name(r[0]),
-                    'ttl': int(r[1]),
-                    'type': r[2],  # IN
-                    'rtype': r[3],  # A, AAAA, SOA, ...
-                    'content': self._decode_content(r[3], r[4]),
-                }
-                for r in lines
-            )
-        else:
-            return (
-                {
-                    'zone': self._decode_name(zone.name),
-                    'name': self._decode_name(r[0]),
-                    'ttl': int(r[1]),
-                    'rtype': r[2],
-                    'content': self._decode_content(r[2], r[3]),
-                }
-                for r in lines
-            )
+        details = self._get_zone_details(zone)
+        return self._parse_rrsets(self._decode_name(details['name']), details['rrsets'])
+
+    def _fetch_records(self, zone):
+        details = self._get_zone_details(zone)
+        zone_name = self._decode_name(details['name'])
+        records = ZoneStore.from_records(zone_name, self._parse_rrsets(zone_name, details['rrsets']))
+        records_fetched.send(sender=self.__class__, zone=zone_name, serial=details['serial'], records=records)
+        return details['serial'], records
 
     def get_records(self, zone, name=None, rtype=None):
-        """ get all records within zone whose name and rtype match (if given). """
+        """
+        get all records within zone whose name and rtype match (if given), as
+        ZoneStore (or selection thereof).
+        """
+        records = single_flight.do((self._encode_name(zone), 'records'), lambda: record_cache.get(
+            self._encode_name(zone),
+            fetch=lambda: self._fetch_records(zone),
+            get_serial=lambda: self.get_serial(zone),
+        ))
+
         if name is None and rtype is None:
-            return list(self.get_all_records(zone))
+            return records
         else:
-            return [
-                r for r in self.get_all_records(zone)
-                if
-                    (r['name'] == name or name is None) and
-                    (r['rtype'] == rtype or rtype is None)
-            ]
-
-    def _update_records(self, zone, name, rtype, ttl, contents):
+            return records.filter(name=name, rtype=rtype)
+
+    def fetch_records(self, zone):
+        """
+        fetch the records of zone from PowerDNS as (serial, ZoneStore) tuple,
+        without looking them up in or adding them to the cache.
+        """
+        return self._fetch_records(zone)
+
+    def invalidate_records(self, zone):
+        """ drop the cached records of zone, e.g. because its serial changed """
+        record_cache.invalidate(self._encode_name(zone))
+        single_flight.forget(self._encode_name(zone))
+
+    def _get_rrset(self, zone, name, rtype):
+        """ get the enabled records and the contents of the disabled ones """
+        name = self._encode_name(name)
+        details = single_flight.do(
+            (self._encode_name(zone), 'rrset', name, rtype),
+            lambda: self._get_zone_details(zone, {'rrset_name': name, 'rrset_type': rtype}),
+        )
+
+        # older PowerDNS versions ignore the filter and return the whole zone
+        rrsets = [
+            r for r in details['rrsets']
+            if r['name'] == name and r['type'] == rtype
+        ]
+
+        records = list(self._parse_rrsets(self._decode_name(details['name']), rrsets))
+        disabled = [
+            self._decode_content(rtype, record['content'])
+            for rrset in rrsets
+            for record in rrset['records']
+            if record.get('disabled')
+        ]
+
+        return records, disabled
+
+    def get_rrset(self, zone, name, rtype):
+        """
+        get all enabled records within zone with the given name and rtype,
+        without downloading the whole zone (if PowerDNS supports filtering rrsets).
+        """
+        return self._get_rrset(zone, name, rtype)[0]
+
+    def _update_records(self, zone, name, rtype, ttl, contents, disabled=()):
+        """
+        replace the rrset by the given contents. The rrset is replaced as a
+        whole, so the contents of its disabled records have to be passed as
+        well to keep them (disabled).
+        """
         assert isinstance(contents, list)
         zone = self._encode_name(zone)
         name = self._encode_name(name)
-        contents = [self._encode_content(rtype, c) for c in contents]
-        rrset = powerdns.RRSet(name, rtype, contents, ttl)
-        zone = self._server.get_zone(zone)
-        zone.create_records([rrset])
+        records = [self._encode_content(rtype, c) for c in contents]
+        records += [(self._encode_content(rtype, c), True) for c in disabled if c not in contents]
+        rrset = powerdns.RRSet(name, rtype, records, ttl)
+        with self._raise_not_found():
+            self._zone(zone).create_records([rrset])
+        record_cache.invalidate(zone)
+        single_flight.forget(zone)
+        records_changed.send(
+            sender=self.__class__,
+            zone=self._decode_name(zone),
+            name=self._decode_name(name),
+            rtype=rtype,
+            ttl=ttl,
+            contents=contents,
+        )
 
     def create_record(self, zone, name, rtype, ttl, content):
-        contents = [r['content'] for r in self.get_records(zone, name, rtype)]
+        old_records, disabled = self._get_rrset(zone, name, rtype)
+        contents = [r['content'] for r in old_records]
         contents.append(content)
-        self._update_records(zone, name, rtype, ttl, contents)
+        self._update_records(zone, name, rtype, ttl, contents, disabled)
 
     def delete_record(self, zone, name, rtype, content):
-        old_records = list(self.get_records(zone, name, rtype))
+        old_records, disabled = self._get_rrset(zone, name, rtype)
 
         if not old_records:
             raise PDNSNotFoundException()  # record is already gone
@@ -153,10 +303,10 @@ class pdns():
 
         ttl = old_records[0]['ttl']
         contents = [r['content'] for r in old_records if r['content'] != content]
-        self._update_records(zone, name, rtype, ttl, contents)
+        self._update_records(zone, name, rtype, ttl, contents, disabled)
 
     def update_record(self, zone, name, rtype, old_content, new_ttl, new_content):
-        old_records = list(self.get_records(zone, name, rtype))
+        old_records, disabled = self._get_rrset(zone, name, rtype)
 
         if not old_records:
             raise PDNSNotFoundException()  # record is already gone
@@ -166,7 +316,7 @@ class pdns():
         contents = [r['content'] for r in old_records if r['content'] != old_content]
         contents.append(new_content)
 
-        self._update_records(zone, name, rtype, new_ttl, contents)
+        self._update_records(zone, name, rtype, new_ttl, contents, disabled)
 
 
 __all__ = [
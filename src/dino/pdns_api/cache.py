@@ -0,0 +1,340 @@
+import contextlib
+import hashlib
+import logging
+import sys
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connections
+
+from dino.common.cachestats import cache_stats
+from dino.common.locks import FileLock
+
+from .zonefiles import zone_files
+
+logger = logging.getLogger(__name__)
+
+
+def run_in_background(func, *args):
+    def run():
+        try:
+            func(*args)
+        finally:
+            # database connections are per thread and would stay open
+            connections.close_all()
+
+    threading.Thread(target=run, daemon=True).start()
+
+
+class LocalZoneCache():
+    """
+    Parsed zones kept in this process, least recently used ones are dropped
+    as soon as all of them take up more than RECORD_CACHE_LOCAL_SIZE
+    megabytes. Sizes are estimated by estimate_size().
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self.resident = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def budget(self):
+        return settings.RECORD_CACHE_LOCAL_SIZE * 1024 * 1024
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def put(self, key, records):
+        size = estimate_size(records)
+        if size > self.budget:
+            return
+
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.resident -= old[1]
+
+            self._entries[key] = (records, size)
+            self.resident += size
+
+            while self.resident > self.budget:
+                evicted, (_, evicted_size) = self._entries.popitem(last=False)
+                self.resident -= evicted_size
+                self.evictions += 1
+                logger.debug(f'evicted records of zone {evicted[0]} ({evicted_size} bytes)')
+
+    def discard(self, zone):
+        """ drop all entries of zone, keys are (zone, ...) tuples """
+        with self._lock:
+            for key in [k for k in self._entries if k[0] == zone]:
+                self.resident -= self._entries.pop(key)[1]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.resident = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'resident': self.resident,
+                'budget': self.budget,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+            }
+
+
+def estimate_size(records):
+    """ bytes taken up by records, a ZoneStore or any other sequence """
+    if hasattr(records, 'nbytes'):
+        return records.nbytes
+    return sys.getsizeof(records) + sum(sys.getsizeof(r) for r in records)
+
+
+class RecordCache():
+    """
+    Cache the parsed records of zones, along with the SOA serial they were
+    fetched at.
+
+    Entries younger than RECORD_CACHE_TTL are served as-is. Older ones are
+    still served, but revalidated in the background: if the zone's serial did
+    not change, the entry is fresh again, otherwise the records are fetched
+    anew. Entries are dropped after RECORD_CACHE_STALE_TTL or as soon as dino
+    modifies the zone.
+
+    Fetching and revalidating a zone's records is serialized across processes
+    by a FileLock. Processes waiting for it reuse the result, as long as the
+    cache is shared among them.
+
+    Entries only hold the serial and a version, which changes whenever the
+    records are fetched. The records themselves are looked up by version: in
+    this process (LocalZoneCache), in ZoneFiles for large zones or in the
+    cache. Records missing in all of them count as a miss.
+
+    ZoneFiles are local to the host, while the cache may be shared by several
+    hosts. The records are thus always stored in the cache too, hosts which
+    don't have the file yet read them from there and write their own.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._revalidating = set()
+        self.local = LocalZoneCache()
+
+    @property
+    def cache(self):
+        return caches[settings.RECORD_CACHE]
+
+    def _key(self, zone):
+        # zone names may be too long or contain characters not allowed in
+        # memcached keys.
+        return 'dino:zone:' + hashlib.sha1(zone.encode()).hexdigest()
+
+    def _records_key(self, zone, version):
+        return f'{self._key(zone)}:{version}'
+
+    def _invalidated_key(self, zone):
+        return f'{self._key(zone)}:invalidated'
+
+    def get(self, zone, fetch, get_serial):
+        """
+        get the records of `zone`. `fetch` is called to get a (serial,
+        records) tuple from PowerDNS, `get_serial` to get the current serial.
+        """
+        entry = self.cache.get(self._key(zone))
+        records = self._records(zone, entry)
+
+        if records is None:
+            with FileLock(self._key(zone)):
+                # another process may have fetched them while we were waiting
+                records = self._records(zone, self.cache.get(self._key(zone)))
+                if records is None:
+                    records = self._refresh(zone, fetch)
+            return records
+
+        if time.time() - entry['fetched'] > settings.RECORD_CACHE_TTL:
+            with self._lock:
+                revalidate = zone not in self._revalidating
+                self._revalidating.add(zone)
+
+            if revalidate:
+                run_in_background(self._revalidate, zone, entry, fetch, get_serial)
+
+        return records
+
+    def _records(self, zone, entry):
+        if entry is None:
+            return None
+
+        records = self.local.get((zone, entry['version']))
+        if records is None:
+            records = zone_files.load(zone, entry['version'])
+            if records is None:
+                records = self.cache.get(self._records_key(zone, entry['version']))
+                if records is not None and zone_files.save(zone, entry['version'], records):
+                    # share the mapped file with the other processes on this host
+                    records = zone_files.load(zone, entry['version']) or records
+            if records is not None:
+                self.local.put((zone, entry['version']), records)
+
+        return records
+
+    def refresh(self, zone, fetch):
+        with FileLock(self._key(zone)):
+            return self._refresh(zone, fetch)
+
+    def _refresh(self, zone, fetch):
+        invalidated = self.cache.get(self._invalidated_key(zone))
+        serial, records = fetch()
+
+        # invalidate() does not wait for the lock, so dino may have changed
+        # the zone while it was fetched: the records may predate the change.
+        if self.cache.get(self._invalidated_key(zone)) != invalidated:
+            return records
+
+        version = f'{serial}-{uuid.uuid4().hex}'
+
+        # store the records first, so they exist once the entry does
+        zone_files.save(zone, version, records)
+        self.cache.set(self._records_key(zone, version), records, settings.RECORD_CACHE_STALE_TTL)
+        self.local.put((zone, version), records)
+
+        self.cache.set(self._key(zone), {
+            'serial': serial,
+            'version': version,
+            'fetched': time.time(),
+        }, settings.RECORD_CACHE_STALE_TTL)
+
+        return records
+
+    def _is_current(self, zone, entry):
+        # false if the entry has been refreshed or invalidated by others
+        current = self.cache.get(self._key(zone))
+        return current is not None and current['fetched'] == entry['fetched']
+
+    def _revalidate(self, zone, entry, fetch, get_serial):
+        try:
+            with FileLock(self._key(zone)):
+                if not self._is_current(zone, entry):
+                    return
+
+                if get_serial() != entry['serial']:
+                    self._refresh(zone, fetch)
+                elif self._is_current(zone, entry):
+                    entry['fetched'] = time.time()
+                    self.cache.set(self._key(zone), entry, settings.RECORD_CACHE_STALE_TTL)
+        except Exception:
+            logger.exception(f'could not revalidate records of zone {zone}')
+        finally:
+            with self._lock:
+                self._revalidating.discard(zone)
+
+    def invalidate(self, zone):
+        # tell fetches in progress not to store what they got
+        self.cache.set(self._invalidated_key(zone), uuid.uuid4().hex, settings.RECORD_CACHE_STALE_TTL)
+
+        entry = self.cache.get(self._key(zone))
+        self.cache.delete(self._key(zone))
+        if entry is not None:
+            self.cache.delete(self._records_key(zone, entry['version']))
+        self.local.discard(zone)
+
+
+class _Call():
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight():
+    """
+    Merge identical reads: while a call for a key is running, other threads
+    asking for the same key wait for its result instead of calling again.
+    Within a scope (e.g. a request, see SingleFlightMiddleware), results are
+    also reused by later calls, until the zone (the first part of each key)
+    is forgotten, e.g. because it was modified.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self._local = threading.local()
+
+    @contextlib.contextmanager
+    def scope(self):
+        self._local.results = {}
+        try:
+            yield
+        finally:
+            self._local.results = None
+
+    @property
+    def _results(self):
+        return getattr(self._local, 'results', None)
+
+    def do(self, key, func):
+        results = self._results
+        if results is not None and key in results:
+            return results[key]
+
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if leader:
+            try:
+                call.result = func()
+            except Exception as e:
+                call.error = e
+            finally:
+                with self._lock:
+                    if self._calls.get(key) is call:
+                        del self._calls[key]
+                call.done.set()
+        else:
+            call.done.wait()
+
+        if call.error is not None:
+            raise call.error
+
+        if results is not None:
+            results[key] = call.result
+
+        return call.result
+
+    def forget(self, zone):
+        """ don't reuse results for zone, which are done or in flight """
+        with self._lock:
+            for key in [k for k in self._calls if k[0] == zone]:
+                del self._calls[key]
+
+        results = self._results
+        if results is not None:
+            for key in [k for k in results if k[0] == zone]:
+                del results[key]
+
+
+record_cache = RecordCache()
+cache_stats.register('local zone cache', record_cache.local.stats)
+single_flight = SingleFlight()
@@ -0,0 +1,182 @@
+import contextlib
+import json
+import os
+import threading
+import time
+
+import powerdns
+import requests
+from django.conf import settings
+from powerdns.exceptions import PDNSError
+from requests.adapters import HTTPAdapter
+
+
+class PDNSApiClient(powerdns.PDNSApiClient):
+    """
+    PDNSApiClient, which sends all requests through a single pooled
+    ``requests.Session``, so connections to PowerDNS are kept alive and reused
+    instead of doing a new TCP/TLS handshake for every request.
+
+    Sessions idle for longer than ``keepalive`` seconds are discarded, as the
+    server has most likely closed the connections by then. A session is idle
+    only while no request is in flight, long-running ones keep it.
+    """
+
+    def __init__(self, api_endpoint, api_key, pool_size=10, keepalive=60, timeout=None):
+        super().__init__(api_endpoint, api_key, timeout=timeout)
+        self._pool_size = pool_size
+        self._keepalive = keepalive
+        self._lock = threading.Lock()
+        self._session = None
+        self._last_used = 0
+        self._in_flight = 0
+
+        if api_key:
+            self.request_headers['X-API-Key'] = api_key
+
+    def _create_session(self):
+        # block instead of opening additional, non-pooled connections once all
+        # pooled ones are in use.
+        adapter = HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=self._pool_size,
+            pool_block=True,
+        )
+        session = requests.Session()
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        return session
+
+    def _get_session(self):
+        # called with self._lock held
+        now = time.monotonic()
+
+        idle = not self._in_flight and now - self._last_used > self._keepalive
+        if self._session is not None and idle:
+            self._session.close()
+            self._session = None
+
+        if self._session is None:
+            self._session = self._create_session()
+
+        self._last_used = now
+        return self._session
+
+    @property
+    def session(self):
+        with self._lock:
+            return self._get_session()
+
+    @contextlib.contextmanager
+    def _use_session(self):
+        with self._lock:
+            session = self._get_session()
+            self._in_flight += 1
+        try:
+            yield session
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+                self._last_used = time.monotonic()
+
+    def close(self):
+        with self._lock:
+            if self._session is not None:
+                self._session.close()
+                self._session = None
+
+    def request(self, path, method, data=None, **kwargs):
+        if not path.startswith(('http://', 'https://')):
+            path = f"{self._api_endpoint}/{path.lstrip('/')}"
+
+        with self._use_session() as session:
+            response = session.request(
+                method, path,
+                data=json.dumps(data or {}),
+                headers=self.request_headers,
+                timeout=self._timeout,
+                verify=self._verify,
+                **kwargs
+            )
+
+        if response.status_code in (200, 201):
+            return response.json()
+        elif response.status_code == 204:
+            return ""
+        elif response.status_code == 404:
+            if path.rstrip('/') == f'{self._api_endpoint}/servers/{settings.PDNS_SERVER_ID}':
+                # the server may have gone away (e.g. failover to another one
+                # with a different id), so look it up again next time.
+                reset_server_info()
+            message = 'Not found'
+        else:
+            try:
+                message = self._get_error(response=response.json())
+            except ValueError:
+                message = response.text
+
+        raise PDNSError(url=response.url, status_code=response.status_code, message=message)
+
+
+_client = None
+_client_pid = None
+_client_lock = threading.Lock()
+_server_info = None
+_server_info_lock = threading.Lock()
+
+
+def get_client():
+    """
+    Get the process-wide PDNSApiClient. Connections must not be shared between
+    processes, so forked children (e.g. uwsgi workers forked from the master)
+    transparently get a client of their own.
+    """
+    global _client, _client_pid
+
+    with _client_lock:
+        if _client is None or _client_pid != os.getpid():
+            _client = PDNSApiClient(
+                api_endpoint=settings.PDNS_APIURL,
+                api_key=settings.PDNS_APIKEY,
+                pool_size=settings.PDNS_POOL_SIZE,
+                keepalive=settings.PDNS_KEEPALIVE,
+                timeout=(settings.PDNS_CONNECT_TIMEOUT, settings.PDNS_READ_TIMEOUT),
+            )
+            _client_pid = os.getpid()
+
+        return _client
+
+
+def reset_client():
+    global _client
+
+    with _client_lock:
+        if _client is not None and _client_pid == os.getpid():
+            _client.close()
+        _client = None
+
+
+def get_server_info():
+    """
+    Get the API data of the PowerDNS server configured in PDNS_SERVER_ID. It is
+    fetched once per process and reused until the API returns a 404 for it.
+    """
+    global _server_info
+
+    with _server_info_lock:
+        if _server_info is not None:
+            return _server_info
+
+    # not fetched while holding the lock, a 404 resets the server info
+    server_info = get_client().get(f'/servers/{settings.PDNS_SERVER_ID}')
+
+    with _server_info_lock:
+        _server_info = server_info
+        return _server_info
+
+
+def reset_server_info():
+    global _server_info
+
+    with _server_info_lock:
+        _server_info = None
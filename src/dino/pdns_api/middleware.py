@@ -0,0 +1,12 @@
+from .cache import single_flight
+
+
+class SingleFlightMiddleware():
+    """ reuse the results of PowerDNS reads for the rest of the request """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with single_flight.scope():
+            return self.get_response(request)
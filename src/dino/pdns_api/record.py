@@ -0,0 +1,21 @@
+from collections import namedtuple
+
+
+class PDNSRecord(namedtuple('PDNSRecord', 'zone name ttl rtype content')):
+    """
+    A single record of a zone. Large zones have hundreds of thousands of them,
+    so records are immutable and use far less memory than dicts. Fields can be
+    read as attributes as well as items, e.g. record['name'].
+    """
+    __slots__ = ()
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            if key not in self._fields:
+                raise KeyError(key)
+            return getattr(self, key)
+
+        return super().__getitem__(key)
+
+    def as_dict(self):
+        return dict(self._asdict())
@@ -0,0 +1,10 @@
+from django.dispatch import Signal
+
+# sent whenever the records of a zone have been fetched from PowerDNS, with
+# the arguments zone (decoded name), serial and records.
+records_fetched = Signal()
+
+# sent after dino replaced an rrset through the API, with the arguments zone,
+# name, rtype, ttl and contents (all decoded). No contents means the rrset
+# has been deleted.
+records_changed = Signal()
@@ -0,0 +1,233 @@
+"""
+Benchmarks for reading zone data from PowerDNS API responses. Run using:
+
+    python -m dino.pdns_api.test.benchmark
+"""
+
+import json
+import os
+import pickle
+import timeit
+import tracemalloc
+
+import idna
+
+SIZES = (1000, 10000, 100000)
+
+
+def make_rrsets(zone_name, size):
+    """ generate rrsets for a zone with (roughly) `size` records """
+    rrsets = []
+    records = 0
+    i = 0
+
+    while records < size:
+        name = f'host{i}.{zone_name}'
+        i += 1
+
+        for rtype, contents in (
+            ('A', [f'192.0.2.{i % 256}']),
+            ('AAAA', [f'2001:db8::{i % 65536:x}', f'2001:db8::1:{i % 65536:x}']),
+            ('TXT', [f'"v=spf1 a mx include:{zone_name} ~all"']),
+        ):
+            rrsets.append({
+                'name': name,
+                'type': rtype,
+                'ttl': 300,
+                'records': [{'content': c, 'disabled': False} for c in contents],
+                'comments': [],
+            })
+            records += len(contents)
+
+    return rrsets
+
+
+def make_zone_json(zone_name, size):
+    """ body of GET /zones/{zone_id} """
+    return json.dumps({
+        'id': zone_name,
+        'name': zone_name,
+        'kind': 'Native',
+        'serial': 1,
+        'rrsets': make_rrsets(zone_name, size),
+    })
+
+
+def make_export_json(zone_name, size):
+    """ body of GET /zones/{zone_id}/export """
+    lines = [
+        f"{rrset['name']}\t{rrset['ttl']}\tIN\t{rrset['type']}\t{r['content']}"
+        for rrset in make_rrsets(zone_name, size)
+        for r in rrset['records']
+    ]
+    return json.dumps({'zone': '\n'.join(lines) + '\n'})
+
+
+def read_export(pdns, zone_name, body):
+    """ the text /export parser get_all_records() used to use, as a baseline """
+    axfr = json.loads(body)['zone'].strip()
+    lines = [r.split('\t') for r in axfr.split('\n')]
+    return [
+        {
+            'zone': pdns._decode_name(zone_name),
+            'name': pdns._decode_name(r[0]),
+            'ttl': int(r[1]),
+            'rtype': r[3],
+            'content': pdns._decode_content(r[3], r[4]),
+        }
+        for r in lines
+    ]
+
+
+def read_rrsets(pdns, zone_name, body):
+    details = json.loads(body)
+    return list(pdns._parse_rrsets(pdns._decode_name(details['name']), details['rrsets']))
+
+
+def bench(func, *args, repeat=3):
+    """ best of `repeat` runs in milliseconds """
+    return min(timeit.repeat(lambda: func(*args), number=1, repeat=repeat)) * 1000
+
+
+def bench_records(pdns, sizes=SIZES, repeat=3):
+    zone_name = 'example.com.'
+
+    for size in sizes:
+        export = make_export_json(zone_name, size)
+        zone = make_zone_json(zone_name, size)
+        yield (
+            size,
+            bench(read_export, pdns, zone_name, export, repeat=repeat),
+            bench(read_rrsets, pdns, zone_name, zone, repeat=repeat),
+        )
+
+
+def to_dicts(records):
+    """ records the way _parse_rrsets() used to return them, as a baseline """
+    return [r.as_dict() for r in records]
+
+
+def measure(func, *args):
+    """ bytes allocated by the result of func """
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        result = func(*args)
+        size = tracemalloc.get_traced_memory()[0] - before
+        del result
+        return size
+    finally:
+        tracemalloc.stop()
+
+
+def read_store(pdns, zone_name, body):
+    from dino.pdns_api.zonestore import ZoneStore
+    return ZoneStore.from_records(zone_name, read_rrsets(pdns, zone_name, body))
+
+
+def bench_memory(pdns, sizes=(100000, 1000000)):
+    """
+    memory used by the records of zones with `sizes` records, as dicts, as
+    PDNSRecords and in a ZoneStore, as well as the pickled ZoneStore.
+    """
+    for size in sizes:
+        body = make_zone_json('example.com.', size)
+        store = read_store(pdns, 'example.com.', body)
+
+        yield (
+            len(store),
+            measure(lambda: to_dicts(read_rrsets(pdns, 'example.com.', body))),
+            measure(read_rrsets, pdns, 'example.com.', body),
+            measure(read_store, pdns, 'example.com.', body),
+            len(pickle.dumps(store)),
+        )
+
+
+def decode_names_idna(names):
+    """ the way _decode_name() used to decode every name, as a baseline """
+    return [
+        '*.' + idna.decode(name[2:]) if name.startswith('*.') else idna.decode(name)
+        for name in names
+    ]
+
+
+def decode_names(pdns, names, cold=True):
+    from dino.pdns_api import _decode_name
+
+    if cold:
+        _decode_name.cache_clear()
+    return [pdns._decode_name(name) for name in names]
+
+
+def bench_names(pdns, size=100000, repeat=3):
+    """ decode the names of a zone with `size` records using idna, cold and warm cache """
+    names = [rrset['name'] for rrset in make_rrsets('example.com.', size)]
+    decode_names(pdns, names)
+
+    return (
+        len(names),
+        bench(decode_names_idna, names, repeat=repeat),
+        bench(decode_names, pdns, names, True, repeat=repeat),
+        bench(decode_names, pdns, names, False, repeat=repeat),
+    )
+
+
+def scan(store, keys):
+    """ a linear scan over all records, the way get_records() used to filter, as a baseline """
+    return [
+        [r for r in store if r.name == name and r.rtype == rtype]
+        for name, rtype in keys
+    ]
+
+
+def lookup(store, keys, cold=True):
+    from dino.pdns_api.zonestore import ZoneIndex
+    if cold:
+        store._index = ZoneIndex.build(store)
+    return [list(store.filter(name=name, rtype=rtype)) for name, rtype in keys]
+
+
+def bench_lookups(pdns, size=100000, lookups=20, repeat=3):
+    """ look up `lookups` rrsets in a zone with `size` records, scanning and using the index """
+    store = read_store(pdns, 'example.com.', make_zone_json('example.com.', size))
+    step = max(len(store) // lookups, 1)
+    keys = [(r.name, r.rtype) for r in store[::step]]
+
+    return (
+        len(keys),
+        bench(scan, store, keys, repeat=repeat),
+        bench(lookup, store, keys, True, repeat=repeat),
+        bench(lookup, store, keys, False, repeat=repeat),
+    )
+
+
+def main():
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'dino.test_settings')
+
+    import django
+    django.setup()
+
+    from dino.pdns_api import pdns
+
+    print(f"{'records':>10} {'export [ms]':>12} {'rrsets [ms]':>12}")
+    for size, export_ms, rrsets_ms in bench_records(pdns()):
+        print(f'{size:>10} {export_ms:>12.1f} {rrsets_ms:>12.1f}')
+
+    print()
+    print(f"{'records':>10} {'dicts [MB]':>12} {'tuples [MB]':>12} {'store [MB]':>12} {'pickled [MB]':>12}")
+    for records, *sizes in bench_memory(pdns()):
+        print(f'{records:>10}' + ''.join(f' {size / 2**20:>12.1f}' for size in sizes))
+
+    print()
+    print(f"{'names':>10} {'idna [ms]':>12} {'cold [ms]':>12} {'warm [ms]':>12}")
+    names, idna_ms, cold_ms, warm_ms = bench_names(pdns())
+    print(f'{names:>10} {idna_ms:>12.1f} {cold_ms:>12.1f} {warm_ms:>12.1f}')
+
+    print()
+    print(f"{'lookups':>10} {'scan [ms]':>12} {'cold [ms]':>12} {'warm [ms]':>12}")
+    lookups, scan_ms, cold_ms, warm_ms = bench_lookups(pdns())
+    print(f'{lookups:>10} {scan_ms:>12.1f} {cold_ms:>12.1f} {warm_ms:>12.1f}')
+
+
+if __name__ == '__main__':
+    main()
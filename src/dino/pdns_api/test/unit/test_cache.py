@@ -0,0 +1,323 @@
+import threading
+
+import pytest
+
+from ...cache import LocalZoneCache, RecordCache, SingleFlight
+from ...record import PDNSRecord
+from ...zonefiles import ZoneFiles
+from ...zonestore import ZoneStore
+
+
+@pytest.fixture
+def record_cache():
+    return RecordCache()
+
+
+@pytest.fixture
+def fetch(mocker):
+    return mocker.Mock(return_value=(2019010101, [{'name': 'example.com.'}]))
+
+
+@pytest.fixture
+def get_serial(mocker):
+    return mocker.Mock(return_value=2019010101)
+
+
+@pytest.fixture
+def mock_time(mocker):
+    return mocker.patch('time.time', return_value=1000)
+
+
+@pytest.fixture
+def mock_run_in_background(mocker):
+    return mocker.patch('dino.pdns_api.cache.run_in_background', side_effect=lambda f, *args: f(*args))
+
+
+def test_record_cache_miss(record_cache, fetch, get_serial):
+    assert record_cache.get('example.com.', fetch, get_serial) == [{'name': 'example.com.'}]
+    fetch.assert_called_once()
+    get_serial.assert_not_called()
+
+
+def test_record_cache_hit(record_cache, fetch, get_serial, mock_time, mock_run_in_background):
+    record_cache.get('example.com.', fetch, get_serial)
+    mock_time.return_value += 30
+    assert record_cache.get('example.com.', fetch, get_serial) == [{'name': 'example.com.'}]
+    fetch.assert_called_once()
+    get_serial.assert_not_called()
+    mock_run_in_background.assert_not_called()
+
+
+def test_record_cache_stale_same_serial(record_cache, fetch, get_serial, mock_time, mock_run_in_background):
+    record_cache.get('example.com.', fetch, get_serial)
+    mock_time.return_value += 31
+    assert record_cache.get('example.com.', fetch, get_serial) == [{'name': 'example.com.'}]
+    fetch.assert_called_once()
+    get_serial.assert_called_once()
+
+    # revalidated entry is fresh again
+    record_cache.get('example.com.', fetch, get_serial)
+    get_serial.assert_called_once()
+
+
+def test_record_cache_stale_new_serial(record_cache, fetch, get_serial, mock_time, mock_run_in_background):
+    record_cache.get('example.com.', fetch, get_serial)
+    mock_time.return_value += 31
+    get_serial.return_value += 1
+    fetch.return_value = (get_serial.return_value, [{'name': 'new.example.com.'}])
+
+    # stale records are served while refreshing
+    assert record_cache.get('example.com.', fetch, get_serial) == [{'name': 'example.com.'}]
+    assert fetch.call_count == 2
+    assert record_cache.get('example.com.', fetch, get_serial) == [{'name': 'new.example.com.'}]
+
+
+def test_record_cache_revalidate_once(record_cache, fetch, get_serial, mock_time, mocker):
+    run_in_background = mocker.patch('dino.pdns_api.cache.run_in_background')
+    record_cache.get('example.com.', fetch, get_serial)
+    mock_time.return_value += 31
+    record_cache.get('example.com.', fetch, get_serial)
+    record_cache.get('example.com.', fetch, get_serial)
+    run_in_background.assert_called_once()
+
+
+def test_record_cache_revalidate_error(record_cache, fetch, get_serial, mock_time, mock_run_in_background):
+    record_cache.get('example.com.', fetch, get_serial)
+    mock_time.return_value += 31
+    get_serial.side_effect = Exception('broken')
+    assert record_cache.get('example.com.', fetch, get_serial) == [{'name': 'example.com.'}]
+    assert not record_cache._revalidating
+
+
+def test_record_cache_revalidate_invalidated(record_cache, fetch, get_serial, mock_time, mock_run_in_background):
+    record_cache.get('example.com.', fetch, get_serial)
+    mock_time.return_value += 31
+    get_serial.side_effect = lambda: record_cache.invalidate('example.com.') or 2019010101
+    record_cache.get('example.com.', fetch, get_serial)
+    assert record_cache.cache.get(record_cache._key('example.com.')) is None
+
+
+def test_record_cache_invalidate(record_cache, fetch, get_serial):
+    record_cache.get('example.com.', fetch, get_serial)
+    record_cache.invalidate('example.com.')
+    record_cache.get('example.com.', fetch, get_serial)
+    assert fetch.call_count == 2
+
+
+def test_record_cache_invalidated_while_fetching(record_cache, fetch, get_serial):
+    def invalidating_fetch():
+        record_cache.invalidate('example.com.')
+        return (2019010101, [{'name': 'old.example.com.'}])
+
+    assert record_cache.get('example.com.', invalidating_fetch, get_serial) == [{'name': 'old.example.com.'}]
+
+    # the records fetched before the change are not stored
+    assert record_cache.get('example.com.', fetch, get_serial) == [{'name': 'example.com.'}]
+    fetch.assert_called_once()
+
+
+def test_record_cache_miss_fetched_while_waiting(record_cache, fetch, get_serial, mocker):
+    # another process stored the records, while this one waited for the lock
+    entry = {'serial': 2019010101, 'version': '2019010101-1', 'fetched': 1000}
+    mocker.patch.object(RecordCache, 'cache', mocker.PropertyMock(return_value=mocker.Mock(**{
+        'get.side_effect': [None, entry, [{'name': 'other.example.com.'}]],
+    })))
+    assert record_cache.get('example.com.', fetch, get_serial) == [{'name': 'other.example.com.'}]
+    fetch.assert_not_called()
+
+
+def test_record_cache_revalidated_while_waiting(record_cache, fetch, get_serial, mock_time, mock_run_in_background, mocker):
+    record_cache.get('example.com.', fetch, get_serial)
+    mock_time.return_value += 31
+
+    # another process refreshed the records, while this one waited for the lock
+    lock = mocker.patch('dino.pdns_api.cache.FileLock')
+    lock.return_value.__enter__.side_effect = lambda: record_cache.refresh('example.com.', fetch)
+    fetch.reset_mock()
+
+    record_cache.get('example.com.', fetch, get_serial)
+    get_serial.assert_not_called()
+
+
+def test_record_cache_local(record_cache, fetch, get_serial, mocker):
+    record_cache.get('example.com.', fetch, get_serial)
+
+    # records are read from the cache only if this process does not have them
+    get = mocker.spy(record_cache.cache, 'get')
+    assert record_cache.get('example.com.', fetch, get_serial) == [{'name': 'example.com.'}]
+    assert get.call_count == 1
+    assert record_cache.local.stats()['hits'] == 1
+
+    record_cache.local.clear()
+    assert record_cache.get('example.com.', fetch, get_serial) == [{'name': 'example.com.'}]
+    assert get.call_count == 3
+    fetch.assert_called_once()
+
+
+def test_record_cache_invalidate_local(record_cache, fetch, get_serial):
+    record_cache.get('example.com.', fetch, get_serial)
+    record_cache.invalidate('example.com.')
+    assert record_cache.local.stats()['entries'] == 0
+
+
+@pytest.fixture
+def local_cache(settings):
+    settings.RECORD_CACHE_LOCAL_SIZE = 1
+    return LocalZoneCache()
+
+
+class zone_of_size(list):
+    def __init__(self, nbytes):
+        super().__init__()
+        self.nbytes = nbytes
+
+
+def test_local_zone_cache(local_cache):
+    assert local_cache.get(('example.com.', 1)) is None
+    local_cache.put(('example.com.', 1), zone_of_size(1000))
+    assert local_cache.get(('example.com.', 1)).nbytes == 1000
+    assert local_cache.stats() == {
+        'entries': 1,
+        'resident': 1000,
+        'budget': 1024 * 1024,
+        'hits': 1,
+        'misses': 1,
+        'evictions': 0,
+    }
+
+
+def test_local_zone_cache_evict_least_recently_used(local_cache):
+    for i in range(3):
+        local_cache.put((f'zone{i}.example.', 1), zone_of_size(400 * 1024))
+    assert local_cache.stats()['evictions'] == 1
+    assert local_cache.get(('zone0.example.', 1)) is None
+
+    # zone1 was used last, so zone2 is the least recently used one now
+    local_cache.get(('zone1.example.', 1))
+    local_cache.put(('zone3.example.', 1), zone_of_size(400 * 1024))
+    assert local_cache.get(('zone2.example.', 1)) is None
+    assert local_cache.get(('zone1.example.', 1)) is not None
+    assert local_cache.stats()['resident'] == 800 * 1024
+
+
+def test_local_zone_cache_too_large(local_cache):
+    local_cache.put(('example.com.', 1), zone_of_size(2 * 1024 * 1024))
+    assert local_cache.stats()['entries'] == 0
+
+
+def test_local_zone_cache_discard(local_cache):
+    local_cache.put(('example.com.', 1), zone_of_size(1000))
+    local_cache.put(('example.com.', 2), zone_of_size(1000))
+    local_cache.put(('example.org.', 1), zone_of_size(1000))
+    local_cache.discard('example.com.')
+    assert local_cache.stats()['entries'] == 1
+    assert local_cache.stats()['resident'] == 1000
+
+
+@pytest.fixture
+def zone_files(settings, tmp_path, mocker):
+    settings.ZONE_FILE_DIR = str(tmp_path)
+    settings.ZONE_FILE_CACHE_SIZE = 1
+    mocker.patch.object(ZoneFiles, 'min_records', 0)
+
+
+def test_record_cache_zone_files(record_cache, fetch, get_serial, zone_files, tmp_path, mocker):
+    records = [PDNSRecord('example.com.', 'example.com.', 300, 'A', '192.0.2.1')]
+    fetch.return_value = (2019010101, ZoneStore.from_records('example.com.', records))
+    record_cache.get('example.com.', fetch, get_serial)
+
+    # records are read from the file, not the cache
+    record_cache.local.clear()
+    get = mocker.spy(record_cache.cache, 'get')
+    assert list(record_cache.get('example.com.', fetch, get_serial)) == records
+    assert get.call_count == 1
+    fetch.assert_called_once()
+
+
+def test_record_cache_zone_files_other_host(record_cache, fetch, get_serial, zone_files, tmp_path):
+    records = [PDNSRecord('example.com.', 'example.com.', 300, 'A', '192.0.2.1')]
+    fetch.return_value = (2019010101, ZoneStore.from_records('example.com.', records))
+    record_cache.get('example.com.', fetch, get_serial)
+
+    # another host sharing the cache has no file, but finds the records in
+    # the cache and writes a file of its own.
+    files = list(tmp_path.iterdir())
+    for path in files:
+        path.unlink()
+    record_cache.local.clear()
+    assert list(record_cache.get('example.com.', fetch, get_serial)) == records
+    fetch.assert_called_once()
+    assert list(tmp_path.iterdir()) == files
+
+
+@pytest.fixture
+def single_flight():
+    return SingleFlight()
+
+
+def test_single_flight_concurrent(single_flight, mocker):
+    started = threading.Event()
+    release = threading.Event()
+
+    def fetch():
+        started.set()
+        release.wait()
+        return 'records'
+
+    func = mocker.Mock(side_effect=fetch)
+    results = []
+    leader = threading.Thread(target=lambda: results.append(single_flight.do(('example.com.', 'records'), func)))
+    leader.start()
+    started.wait()
+
+    follower = threading.Thread(target=lambda: results.append(single_flight.do(('example.com.', 'records'), func)))
+    follower.start()
+    follower.join(0.1)
+    release.set()
+    leader.join()
+    follower.join()
+
+    assert results == ['records', 'records']
+    func.assert_called_once()
+
+
+def test_single_flight_no_scope(single_flight, mocker):
+    func = mocker.Mock(return_value='records')
+    single_flight.do(('example.com.', 'records'), func)
+    single_flight.do(('example.com.', 'records'), func)
+    assert func.call_count == 2
+
+
+def test_single_flight_scope(single_flight, mocker):
+    func = mocker.Mock(return_value='records')
+
+    with single_flight.scope():
+        single_flight.do(('example.com.', 'records'), func)
+        single_flight.do(('example.com.', 'records'), func)
+        single_flight.do(('example.org.', 'records'), func)
+        assert func.call_count == 2
+
+    single_flight.do(('example.com.', 'records'), func)
+    assert func.call_count == 3
+
+
+def test_single_flight_forget(single_flight, mocker):
+    func = mocker.Mock(return_value='records')
+
+    with single_flight.scope():
+        single_flight.do(('example.com.', 'records'), func)
+        single_flight.do(('example.org.', 'records'), func)
+        single_flight.forget('example.com.')
+        single_flight.do(('example.com.', 'records'), func)
+        single_flight.do(('example.org.', 'records'), func)
+
+    assert func.call_count == 3
+
+
+def test_single_flight_error(single_flight, mocker):
+    func = mocker.Mock(side_effect=[Exception('broken'), 'records'])
+
+    with single_flight.scope():
+        with pytest.raises(Exception):
+            single_flight.do(('example.com.', 'records'), func)
+        assert single_flight.do(('example.com.', 'records'), func) == 'records'
@@ -0,0 +1,154 @@
+import pytest
+
+from ... import PDNSError
+from ...client import (
+    PDNSApiClient, get_client, get_server_info, reset_client, reset_server_info,
+)
+
+
+@pytest.fixture
+def api_client():
+    return PDNSApiClient('http://pdns/api/v1', 'key', pool_size=3, keepalive=60, timeout=(1, 2))
+
+
+@pytest.fixture
+def mock_session_request(mocker):
+    def f(status_code, json=None, text=''):
+        response = mocker.Mock(status_code=status_code, text=text, url='http://pdns/api/v1/servers')
+        response.json.return_value = json
+        return mocker.patch('requests.Session.request', return_value=response)
+
+    return f
+
+
+@pytest.fixture
+def fresh_client():
+    reset_client()
+    reset_server_info()
+    yield
+    reset_client()
+    reset_server_info()
+
+
+def test_client_request(api_client, mock_session_request):
+    request = mock_session_request(200, json=[{'id': 'localhost'}])
+    assert api_client.get('/servers') == [{'id': 'localhost'}]
+    request.assert_called_once()
+    args, kwargs = request.call_args
+    assert args == ('GET', 'http://pdns/api/v1/servers')
+    assert kwargs['headers']['X-API-Key'] == 'key'
+    assert kwargs['timeout'] == (1, 2)
+
+
+def test_client_request_no_content(api_client, mock_session_request):
+    mock_session_request(204)
+    assert api_client.delete('/servers/localhost/zones/example.com.') == ""
+
+
+@pytest.mark.parametrize('status_code,json,message', [
+    (404, None, 'Not found'),
+    (422, {'error': 'broken'}, 'broken'),
+])
+def test_client_request_error(api_client, mock_session_request, status_code, json, message):
+    mock_session_request(status_code, json=json)
+    with pytest.raises(PDNSError) as excinfo:
+        api_client.get('/servers')
+    assert excinfo.value.status_code == status_code
+    assert excinfo.value.message == message
+
+
+def test_client_session_reused(api_client):
+    assert api_client.session is api_client.session
+
+
+def test_client_session_pool_size(api_client):
+    adapter = api_client.session.get_adapter('https://pdns/')
+    assert adapter._pool_maxsize == 3
+    assert adapter._pool_block
+
+
+def test_client_session_keepalive(api_client, mocker):
+    monotonic = mocker.patch('time.monotonic', return_value=100)
+    session = api_client.session
+
+    monotonic.return_value = 150
+    assert api_client.session is session
+
+    monotonic.return_value = 211
+    assert api_client.session is not session
+
+
+def test_client_session_keepalive_in_flight(api_client, mocker):
+    monotonic = mocker.patch('time.monotonic', return_value=100)
+
+    with api_client._use_session() as session:
+        # another request starts while a long one is still running
+        monotonic.return_value = 300
+        assert api_client.session is session
+
+    monotonic.return_value = 350
+    assert api_client.session is session
+
+
+def test_get_client(fresh_client):
+    assert get_client() is get_client()
+
+
+def test_get_client_settings(fresh_client, settings):
+    settings.PDNS_CONNECT_TIMEOUT = 3
+    settings.PDNS_READ_TIMEOUT = 4
+    assert get_client()._timeout == (3, 4)
+
+
+def test_get_client_fork(fresh_client, mocker):
+    client = get_client()
+    mocker.patch('os.getpid', return_value=-1)
+    assert get_client() is not client
+
+
+def test_get_server_info(fresh_client, mock_session_request, settings):
+    settings.PDNS_SERVER_ID = 'ns1'
+    request = mock_session_request(200, json={'id': 'ns1'})
+    assert get_server_info() == {'id': 'ns1'}
+    assert get_server_info() == {'id': 'ns1'}
+    request.assert_called_once()
+    assert request.call_args[0][1].endswith('/servers/ns1')
+
+
+def test_get_server_info_zone_not_found(fresh_client, mock_session_request, settings):
+    settings.PDNS_SERVER_ID = 'localhost'
+    request = mock_session_request(200, json={'id': 'localhost'})
+    get_server_info()
+
+    mock_session_request(404)
+    with pytest.raises(PDNSError):
+        get_client().get('/servers/localhost/zones/example.com.')
+
+    request = mock_session_request(200, json={'id': 'localhost'})
+    get_server_info()
+    request.assert_not_called()
+
+
+def test_get_server_info_not_found(fresh_client, mock_session_request, settings):
+    settings.PDNS_SERVER_ID = 'localhost'
+    request = mock_session_request(200, json={'id': 'localhost'})
+    get_server_info()
+
+    mock_session_request(404)
+    with pytest.raises(PDNSError):
+        get_client().get('/servers/localhost')
+
+    request = mock_session_request(200, json={'id': 'localhost'})
+    get_server_info()
+    request.assert_called_once()
+
+
+def test_get_server_info_lookup_not_found(fresh_client, mock_session_request, settings):
+    settings.PDNS_SERVER_ID = 'gone'
+    mock_session_request(404)
+    with pytest.raises(PDNSError):
+        get_server_info()
+
+    request = mock_session_request(200, json={'id': 'gone'})
+    assert get_server_info() == {'id': 'gone'}
+    request.assert_called_once()
@@ -0,0 +1,17 @@
+from ...cache import single_flight
+from ...middleware import SingleFlightMiddleware
+
+
+def test_single_flight_middleware(mocker):
+    func = mocker.Mock(return_value='records')
+
+    def view(request):
+        single_flight.do(('example.com.', 'records'), func)
+        single_flight.do(('example.com.', 'records'), func)
+        return 'response'
+
+    middleware = SingleFlightMiddleware(view)
+    assert middleware(None) == 'response'
+    assert middleware(None) == 'response'
+    assert func.call_count == 2
+    assert single_flight._results is None
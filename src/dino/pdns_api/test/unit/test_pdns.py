@@ -1,19 +1,27 @@
+import idna
 import powerdns
 import pytest
 
-from ... import PDNSNotFoundException
+from ... import PDNSError, PDNSNotFoundException
+from ...cache import single_flight
+from ...client import PDNSApiClient
+from ...signals import records_changed, records_fetched
 
 
 @pytest.fixture
-def pdns():
+def pdns(mocker, client, db):
+    # db: fetching records updates synczones.Zone through records_fetched
     from ... import pdns
+    mocker.patch('dino.pdns_api.get_client', return_value=client[0])
     return pdns()
 
 
 @pytest.fixture
-def client(mocker):
-    client = powerdns.PDNSApiClient('', '')
-    server = powerdns.interface.PDNSServer(client, {
+def client(mocker, mock_lib_pdns_zones):
+    # python-powerdns binds request() when the client is created, so the mock
+    # has to be in place already.
+    client = PDNSApiClient('', '')
+    server_info = {
         "type": "Server",
         "id": "localhost",
         "url": "/api/v1/servers/localhost",
@@ -21,8 +29,9 @@ def client(mocker):
         "version": "VERSION",
         "config_url": "/api/v1/servers/localhost/config{/config_setting}",
         "zones_url": "/api/v1/servers/localhost/zones{/zone}",
-    })
-    mocker.patch('powerdns.interface.PDNSEndpoint.servers', new_callable=mocker.PropertyMock, return_value=[server])
+    }
+    server = powerdns.interface.PDNSServer(client, server_info)
+    mocker.patch('dino.pdns_api.get_server_info', return_value=server_info)
     return client, server
 
 
@@ -65,52 +74,66 @@ def test_pdns_delete_zone_punycode(pdns, mock_lib_pdns_delete_zone):
 
 
 @pytest.fixture
-def mock_lib_pdns_get_zone(mocker, client):
-    def f(zone):
-        return powerdns.interface.PDNSZone(client[0], client[1], {
-            'name': zone,
-            'url': '',
-        })
-
-    return mocker.patch('powerdns.interface.PDNSServer.get_zone', side_effect=f)
+def mock_lib_pdns_zones(mocker):
+    def rrset(name, rtype, ttl, *contents, disabled=()):
+        return {
+            'name': name,
+            'type': rtype,
+            'ttl': ttl,
+            'records': (
+                [{'content': c, 'disabled': False} for c in contents] +
+                [{'content': c, 'disabled': True} for c in disabled]
+            ),
+            'comments': [],
+        }
+
+    zones = {
+        'example.com.': [
+            rrset('www.example.com.', 'AAAA', 300, '1.2.3.4', '4.3.2.1', disabled=['5.6.7.8']),
+            rrset('mail.example.com.', 'A', 600, '4.3.2.1'),
+            rrset('foo.example.com.', 'TXT', 600, '"\\\\\\"\\""'),
+        ],
+        'xn--smething-n4a.com.': [
+            rrset('xn--smething-n4a.com.', 'A', 300, '1.2.3.4'),
+            rrset('xn--wht-rla.xn--smething-n4a.com.', 'A', 300, '4.3.2.1'),
+        ],
+    }
+
+    def f(path, method, data=None, **kwargs):
+        prefix, _, zone = path.rpartition('/')
+
+        if path == '/servers/localhost/zones':
+            return [
+                {'id': zone, 'name': zone, 'kind': 'Native', 'serial': 1, 'masters': []}
+                for zone in zones
+            ]
+        elif prefix != '/servers/localhost/zones':
+            raise Exception('unknown path, fix the test or extend this mock.')
+        elif zone not in zones:
+            raise PDNSError(path, 404, 'Not found')
+        elif method == 'PATCH':
+            return ''
+
+        rrsets = zones[zone]
+        params = kwargs.get('params') or {}
+        if 'rrset_name' in params:
+            rrsets = [r for r in rrsets if r['name'] == params['rrset_name'] and r['type'] == params['rrset_type']]
+
+        return {'id': zone, 'name': zone, 'kind': 'Native', 'serial': 1, 'rrsets': rrsets}
+
+    return mocker.patch('dino.pdns_api.client.PDNSApiClient.request', side_effect=f)
+
+
+def test_pdns_get_zones(pdns, mock_lib_pdns_zones):
+    assert pdns.get_zones() == [
+        {'name': 'example.com.', 'serial': 1, 'kind': 'Native', 'masters': []},
+        {'name': 'sömething.com.', 'serial': 1, 'kind': 'Native', 'masters': []},
+    ]
 
 
-@pytest.fixture
-def mock_lib_pdns_axfr(mocker):
-    def f(path, method):
-        if path == '/servers/localhost/zones/example.com./export':
-            return {
-                'zone': '''
-www.example.com.\t300\tAAAA\t1.2.3.4
-www.example.com.\t300\tAAAA\t4.3.2.1
-mail.example.com.\t600\tA\t4.3.2.1
-foo.example.com.\t600\tTXT\t"\\\\\\"\\""
-'''
-            }
-        if path == '/servers/localhost/zones/new.example.com./export':
-            # https://github.com/Uberspace/dino/issues/83
-            return {
-                'zone': '''
-www.example.com.\t300\tIN\tAAAA\t1.2.3.4
-www.example.com.\t300\tIN\tAAAA\t4.3.2.1
-'''
-            }
-        elif path == '/servers/localhost/zones/xn--smething-n4a.com./export':
-            return {
-                'zone': '''
-xn--smething-n4a.com.\t300\tA\t1.2.3.4
-xn--wht-rla.xn--smething-n4a.com.\t300\tA\t4.3.2.1
-'''
-            }
-        else:
-            raise Exception('unknown domain, fix the test or extend this mock.')
-
-    return mocker.patch('powerdns.client.PDNSApiClient.request', side_effect=f)
-
-
-def test_pdns_get_all_records(pdns, mock_lib_pdns_axfr, mock_lib_pdns_get_zone):
+def test_pdns_get_all_records(pdns, mock_lib_pdns_zones, client):
     r = pdns.get_all_records('example.com.')
-    r = list(r)
+    r = [record.as_dict() for record in r]
     assert r == [
         {'zone': 'example.com.', 'name': 'www.example.com.', 'ttl': 300, 'rtype': 'AAAA', 'content': '1.2.3.4'},
         {'zone': 'example.com.', 'name': 'www.example.com.', 'ttl': 300, 'rtype': 'AAAA', 'content': '4.3.2.1'},
@@ -119,28 +142,42 @@ def test_pdns_get_all_records(pdns, mock_lib_pdns_axfr, mock_lib_pdns_get_zone):
     ]
 
 
-def test_pdns_get_all_records_new_pdns(pdns, mock_lib_pdns_axfr, mock_lib_pdns_get_zone):
-    # https://github.com/Uberspace/dino/issues/83
-    r = pdns.get_all_records('new.example.com.')
-    r = list(r)
-    assert r == [
-        {'zone': 'new.example.com.', 'name': 'www.example.com.', 'ttl': 300, 'type': 'IN', 'rtype': 'AAAA', 'content': '1.2.3.4'},
-        {'zone': 'new.example.com.', 'name': 'www.example.com.', 'ttl': 300, 'type': 'IN', 'rtype': 'AAAA', 'content': '4.3.2.1'},
-    ]
-
-
-def test_pdns_get_all_records_punycode(pdns, mock_lib_pdns_axfr, mock_lib_pdns_get_zone):
+def test_pdns_get_all_records_punycode(pdns, mock_lib_pdns_zones, client):
     r = pdns.get_all_records('sömething.com.')
-    r = list(r)
+    r = [record.as_dict() for record in r]
     assert r == [
         {'zone': 'sömething.com.', 'name': 'sömething.com.', 'ttl': 300, 'rtype': 'A', 'content': '1.2.3.4'},
         {'zone': 'sömething.com.', 'name': 'whät.sömething.com.', 'ttl': 300, 'rtype': 'A', 'content': '4.3.2.1'},
     ]
 
 
-def test_pdns_get_records(pdns, mock_lib_pdns_axfr, mock_lib_pdns_get_zone):
+def test_pdns_get_all_records_not_found(pdns, mock_lib_pdns_zones, client):
+    with pytest.raises(PDNSNotFoundException):
+        list(pdns.get_all_records('missing.example.com.'))
+
+
+def test_pdns_update_records_punycode(pdns, mock_lib_pdns_zones, client):
+    pdns._update_records('sömething.com.', 'sömething.com.', 'A', 300, ['1.2.3.4'])
+    args, kwargs = mock_lib_pdns_zones.call_args
+    assert kwargs['method'] == 'PATCH'
+    assert args[0] == '/servers/localhost/zones/xn--smething-n4a.com.'
+
+
+def test_pdns_update_records_not_found(pdns, mock_lib_pdns_zones, client):
+    mock_lib_pdns_zones.side_effect = PDNSError('/', 404, 'Not found')
+    with pytest.raises(PDNSNotFoundException):
+        pdns._update_records('example.com.', 'example.com.', 'A', 300, ['1.2.3.4'])
+
+
+def test_pdns_update_records_error(pdns, mock_lib_pdns_zones, client):
+    mock_lib_pdns_zones.side_effect = PDNSError('/', 422, 'broken')
+    with pytest.raises(PDNSError):
+        pdns._update_records('example.com.', 'example.com.', 'A', 300, ['1.2.3.4'])
+
+
+def test_pdns_get_records(pdns, mock_lib_pdns_zones, client):
     r = pdns.get_records('example.com.')
-    r = list(r)
+    r = [record.as_dict() for record in r]
     assert r == [
         {'zone': 'example.com.', 'name': 'www.example.com.', 'ttl': 300, 'rtype': 'AAAA', 'content': '1.2.3.4'},
         {'zone': 'example.com.', 'name': 'www.example.com.', 'ttl': 300, 'rtype': 'AAAA', 'content': '4.3.2.1'},
@@ -149,29 +186,60 @@ def test_pdns_get_records(pdns, mock_lib_pdns_axfr, mock_lib_pdns_get_zone):
     ]
 
 
-def test_pdns_get_records_name(pdns, mock_lib_pdns_axfr, mock_lib_pdns_get_zone):
+def test_pdns_get_records_name(pdns, mock_lib_pdns_zones, client):
     r = pdns.get_records('example.com.', name='www.example.com.')
-    r = list(r)
+    r = [record.as_dict() for record in r]
     assert r == [
         {'zone': 'example.com.', 'name': 'www.example.com.', 'ttl': 300, 'rtype': 'AAAA', 'content': '1.2.3.4'},
         {'zone': 'example.com.', 'name': 'www.example.com.', 'ttl': 300, 'rtype': 'AAAA', 'content': '4.3.2.1'},
     ]
 
 
-def test_pdns_get_records_rtype(pdns, mock_lib_pdns_axfr, mock_lib_pdns_get_zone):
+def test_pdns_get_records_rtype(pdns, mock_lib_pdns_zones, client):
     r = pdns.get_records('example.com.', rtype='A')
-    r = list(r)
+    r = [record.as_dict() for record in r]
     assert r == [
         {'zone': 'example.com.', 'name': 'mail.example.com.', 'ttl': 600, 'rtype': 'A', 'content': '4.3.2.1'},
     ]
 
 
+def test_pdns_get_rrset(pdns, mock_lib_pdns_zones):
+    r = [record.as_dict() for record in pdns.get_rrset('example.com.', 'www.example.com.', 'AAAA')]
+    assert r == [
+        {'zone': 'example.com.', 'name': 'www.example.com.', 'ttl': 300, 'rtype': 'AAAA', 'content': '1.2.3.4'},
+        {'zone': 'example.com.', 'name': 'www.example.com.', 'ttl': 300, 'rtype': 'AAAA', 'content': '4.3.2.1'},
+    ]
+    assert mock_lib_pdns_zones.call_args[1]['params'] == {'rrset_name': 'www.example.com.', 'rrset_type': 'AAAA'}
+
+
+def test_pdns_get_rrset_punycode(pdns, mock_lib_pdns_zones):
+    r = [record.as_dict() for record in pdns.get_rrset('sömething.com.', 'whät.sömething.com.', 'A')]
+    assert r == [
+        {'zone': 'sömething.com.', 'name': 'whät.sömething.com.', 'ttl': 300, 'rtype': 'A', 'content': '4.3.2.1'},
+    ]
+
+
+def test_pdns_get_rrset_unfiltered(pdns, mock_lib_pdns_zones):
+    # PowerDNS versions without rrset_name/rrset_type support return all rrsets
+    request = mock_lib_pdns_zones.side_effect
+    mock_lib_pdns_zones.side_effect = lambda path, method, **kwargs: request(path, method)
+    r = [record.as_dict() for record in pdns.get_rrset('example.com.', 'mail.example.com.', 'A')]
+    assert r == [
+        {'zone': 'example.com.', 'name': 'mail.example.com.', 'ttl': 600, 'rtype': 'A', 'content': '4.3.2.1'},
+    ]
+
+
+def test_pdns_get_rrset_not_found(pdns, mock_lib_pdns_zones):
+    with pytest.raises(PDNSNotFoundException):
+        pdns.get_rrset('missing.example.com.', 'missing.example.com.', 'A')
+
+
 @pytest.fixture
 def mock_create_records(mocker):
     return mocker.patch('powerdns.interface.PDNSZone.create_records')
 
 
-def test_pdns_create_record(pdns, mock_lib_pdns_axfr, mock_lib_pdns_get_zone, mock_create_records):
+def test_pdns_create_record(pdns, mock_lib_pdns_zones, client, mock_create_records):
     pdns.create_record('example.com.', 'www.example.com.', 'AAAA', 400, '0 example.org.')
     mock_create_records.assert_called_once()
     rrsets = mock_create_records.call_args[0]
@@ -183,10 +251,11 @@ def test_pdns_create_record(pdns, mock_lib_pdns_axfr, mock_lib_pdns_get_zone, mo
         {'content': '1.2.3.4', 'disabled': False},
         {'content': '4.3.2.1', 'disabled': False},
         {'content': '0 example.org.', 'disabled': False},
+        {'content': '5.6.7.8', 'disabled': True},
     ]
 
 
-def test_pdns_create_record_quotes(pdns, mock_lib_pdns_axfr, mock_lib_pdns_get_zone, mock_create_records):
+def test_pdns_create_record_quotes(pdns, mock_lib_pdns_zones, client, mock_create_records):
     pdns.create_record('example.com.', 'www.example.com.', 'TXT', 400, '"\\')
     mock_create_records.assert_called_once()
     rrsets = mock_create_records.call_args[0]
@@ -195,10 +264,9 @@ def test_pdns_create_record_quotes(pdns, mock_lib_pdns_axfr, mock_lib_pdns_get_z
     ]
 
 
-def test_pdns_create_record_punycode(pdns, mock_lib_pdns_axfr, mock_lib_pdns_get_zone, mock_create_records):
+def test_pdns_create_record_punycode(pdns, mock_lib_pdns_zones, client, mock_create_records):
     pdns.create_record('sömething.com.', 'mail.sömething.com.', 'MX', 400, '0 example.org')
     mock_create_records.assert_called_once()
-    mock_lib_pdns_get_zone.assert_called_with('xn--smething-n4a.com.')
     rrsets = mock_create_records.call_args[0]
     assert rrsets[0][0]['name'] == 'mail.xn--smething-n4a.com.'
     assert rrsets[0][0]['type'] == 'MX'
@@ -208,7 +276,7 @@ def test_pdns_create_record_punycode(pdns, mock_lib_pdns_axfr, mock_lib_pdns_get
     ]
 
 
-def test_pdns_delete_record(pdns, mock_lib_pdns_axfr, mock_lib_pdns_get_zone, mock_create_records):
+def test_pdns_delete_record(pdns, mock_lib_pdns_zones, client, mock_create_records):
     pdns.delete_record('example.com.', 'www.example.com.', 'AAAA', '1.2.3.4')
     mock_create_records.assert_called_once()
     rrsets = mock_create_records.call_args[0]
@@ -218,20 +286,22 @@ def test_pdns_delete_record(pdns, mock_lib_pdns_axfr, mock_lib_pdns_get_zone, mo
     assert rrsets[0][0]['ttl'] == 300
     assert rrsets[0][0]['records'] == [
         {'content': '4.3.2.1', 'disabled': False},
+        {'content': '5.6.7.8', 'disabled': True},
     ]
 
 
 @pytest.mark.parametrize('args', [
     ['example.com.', 'www.example.com.', 'AAAA', '5.5.5.5'],
     ['example.com.', 'www.example.com.', 'A', '1.2.3.4'],
+    ['example.com.', 'www.example.com.', 'AAAA', '5.6.7.8'],
 ])
-def test_pdns_delete_record_gone(pdns, mock_lib_pdns_axfr, mock_lib_pdns_get_zone, mock_create_records, args):
+def test_pdns_delete_record_gone(pdns, mock_lib_pdns_zones, client, mock_create_records, args):
     with pytest.raises(PDNSNotFoundException):
         pdns.delete_record(*args)
     mock_create_records.assert_not_called()
 
 
-def test_pdns_update_record(pdns, mock_lib_pdns_axfr, mock_lib_pdns_get_zone, mock_create_records):
+def test_pdns_update_record(pdns, mock_lib_pdns_zones, client, mock_create_records):
     pdns.update_record(
         'example.com.',
         'www.example.com.',
@@ -249,6 +319,16 @@ def test_pdns_update_record(pdns, mock_lib_pdns_axfr, mock_lib_pdns_get_zone, mo
     assert rrsets[0][0]['records'] == [
         {'content': '4.3.2.1', 'disabled': False},
         {'content': '1.2.3.5', 'disabled': False},
+        {'content': '5.6.7.8', 'disabled': True},
+    ]
+
+
+def test_pdns_update_record_enable(pdns, mock_lib_pdns_zones, client, mock_create_records):
+    pdns.update_record('example.com.', 'www.example.com.', 'AAAA', '1.2.3.4', 300, '5.6.7.8')
+    rrsets = mock_create_records.call_args[0]
+    assert rrsets[0][0]['records'] == [
+        {'content': '4.3.2.1', 'disabled': False},
+        {'content': '5.6.7.8', 'disabled': False},
     ]
 
 
@@ -270,3 +350,125 @@ def test_encode_name(pdns, name, punycode):
 @pytest.mark.parametrize('punycode,name', punyzones)
 def test_decode_name(pdns, punycode, name):
     assert pdns._decode_name(name) == punycode
+
+
+@pytest.mark.parametrize('name', [
+    'example.com.', 'example.com', 'www.example.com.', '_dmarc.example.com.', 'a-b.example.com.',
+    'Example.COM.', 'xn--smething-n4a.com.', 'a--b.com.', 'ab--c.com.', '-a.com.', 'a-.com.',
+    '.', 'a..b.', 'x' * 63 + '.com.', 'x' * 64 + '.com.', 'a.' * 126 + 'b', 'a.' * 127, '*.example.com.',
+    '*.*.example.com.', 'sömething.com.',
+])
+@pytest.mark.parametrize('fast,slow', [
+    ('_encode_name', lambda n: idna.encode(n).decode('ascii')),
+    ('_decode_name', idna.decode),
+])
+def test_name_plain_matches_idna(pdns, name, fast, slow):
+    def call(func, name):
+        try:
+            return func(name)
+        except idna.IDNAError as e:
+            return type(e)
+
+    def wildcard(func):
+        return lambda n: '*.' + func(n[2:]) if n.startswith('*.') else func(n)
+
+    assert call(getattr(pdns, fast), name) == call(wildcard(slow), name)
+
+
+@pytest.mark.parametrize('name,zone_id', [
+    ['example.com.', 'example.com.'],
+    ['example.com', 'example.com.'],
+    ['xn--exmple-cua.com.', 'xn--exmple-cua.com.'],
+    ['exa_mple.com.', 'exa=5Fmple.com.'],
+    ['exa/mple.com.', 'exa=2Fmple.com.'],
+    ['.', '=2E'],
+])
+def test_zone_id(pdns, name, zone_id):
+    assert pdns._zone_id(name) == zone_id
+
+
+def test_parse_rrsets_matches_export(pdns):
+    from ..benchmark import make_export_json, make_zone_json, read_export, read_rrsets
+    export = read_export(pdns, 'example.com.', make_export_json('example.com.', 100))
+    rrsets = read_rrsets(pdns, 'example.com.', make_zone_json('example.com.', 100))
+    assert len(rrsets) >= 100
+    assert [r.as_dict() for r in rrsets] == export
+
+
+def test_bench_records(pdns):
+    from ..benchmark import bench_records
+    assert [r[0] for r in bench_records(pdns, sizes=[10], repeat=1)] == [10]
+
+
+def test_pdns_get_records_cached(pdns, mock_lib_pdns_zones):
+    r = pdns.get_records('example.com.')
+    assert list(pdns.get_records('example.com.')) == list(r)
+    assert mock_lib_pdns_zones.call_count == 1
+
+
+def test_pdns_update_records_invalidates_cache(pdns, mock_lib_pdns_zones):
+    pdns.get_records('sömething.com.')
+    pdns._update_records('sömething.com.', 'sömething.com.', 'A', 300, ['1.2.3.4'])
+    pdns.get_records('sömething.com.')
+    assert [c[1]['method'] for c in mock_lib_pdns_zones.call_args_list] == ['GET', 'PATCH', 'GET']
+
+
+def test_pdns_get_records_signal(pdns, mock_lib_pdns_zones, mocker):
+    receiver = mocker.Mock()
+    records_fetched.connect(receiver)
+    try:
+        pdns.get_records('example.com.')
+    finally:
+        records_fetched.disconnect(receiver)
+
+    kwargs = receiver.call_args[1]
+    assert (kwargs['zone'], kwargs['serial'], len(kwargs['records'])) == ('example.com.', 1, 4)
+
+
+def test_pdns_update_records_signal(pdns, mock_lib_pdns_zones, mocker):
+    receiver = mocker.Mock()
+    records_changed.connect(receiver)
+    try:
+        pdns.create_record('sömething.com.', 'wät.sömething.com.', 'A', 300, '192.0.2.1')
+    finally:
+        records_changed.disconnect(receiver)
+
+    kwargs = receiver.call_args[1]
+    assert (kwargs['zone'], kwargs['name'], kwargs['contents']) == ('sömething.com.', 'wät.sömething.com.', ['192.0.2.1'])
+
+
+def test_pdns_single_flight(pdns, mock_lib_pdns_zones, mock_create_records):
+    with single_flight.scope():
+        pdns.get_rrset('example.com.', 'www.example.com.', 'AAAA')
+        pdns.get_rrset('example.com.', 'www.example.com.', 'AAAA')
+        assert mock_lib_pdns_zones.call_count == 1
+
+        pdns.create_record('example.com.', 'www.example.com.', 'AAAA', 300, '::1')
+        pdns.get_rrset('example.com.', 'www.example.com.', 'AAAA')
+        assert mock_lib_pdns_zones.call_count == 2
+
+
+def test_pdns_get_serial(pdns, mock_lib_pdns_zones):
+    assert pdns.get_serial('example.com.') == 1
+    assert mock_lib_pdns_zones.call_args[1]['params'] == {'rrsets': 'false'}
+
+
+def test_bench_names(pdns):
+    from ..benchmark import bench_names
+    names, *timings = bench_names(pdns, size=100, repeat=1)
+    assert names == 75
+    assert all(t > 0 for t in timings)
+
+
+def test_bench_memory(pdns):
+    from ..benchmark import bench_memory
+    [(records, dicts, tuples, store, pickled)] = bench_memory(pdns, sizes=[1000])
+    assert records >= 1000
+    assert dicts > tuples > store
+
+
+def test_bench_lookups(pdns):
+    from ..benchmark import bench_lookups
+    lookups, *timings = bench_lookups(pdns, size=100, lookups=5, repeat=1)
+    assert lookups >= 5
+    assert all(t > 0 for t in timings)
@@ -0,0 +1,47 @@
+import pickle
+
+import pytest
+from django.core import signing
+from django.template import Context, Template
+
+from dino.common.templatetags.deleteconfirm import sign
+
+from ...record import PDNSRecord
+
+
+@pytest.fixture
+def record():
+    return PDNSRecord(zone='example.com.', name='www.example.com.', ttl=300, rtype='A', content='192.0.2.1')
+
+
+def test_record_fields(record):
+    assert record.name == 'www.example.com.'
+    assert record['rtype'] == 'A'
+    with pytest.raises(KeyError):
+        record['type']
+
+
+def test_record_immutable(record):
+    with pytest.raises(AttributeError):
+        record.ttl = 600
+    with pytest.raises(AttributeError):
+        record.foo = 'bar'
+
+
+def test_record_eq(record):
+    assert record == PDNSRecord(**record.as_dict())
+    assert record != PDNSRecord(**{**record.as_dict(), 'ttl': 600})
+    assert len({record, PDNSRecord(**record.as_dict())}) == 1
+
+
+def test_record_pickle(record):
+    assert pickle.loads(pickle.dumps(record)) == record
+
+
+def test_record_sign(record):
+    assert signing.loads(sign(record)) == record.as_dict()
+
+
+def test_record_template(record):
+    template = Template('{{ rr.rtype }} {{ rr.name }} {{ rr.content }}')
+    assert template.render(Context({'rr': record})) == 'A www.example.com. 192.0.2.1'
@@ -0,0 +1,75 @@
+import os
+
+import pytest
+
+from ...record import PDNSRecord
+from ...zonefiles import ZoneFiles
+from ...zonestore import ZoneStore
+
+
+@pytest.fixture
+def zone_files(settings, tmp_path, mocker):
+    settings.ZONE_FILE_DIR = str(tmp_path)
+    settings.ZONE_FILE_CACHE_SIZE = 1
+    mocker.patch.object(ZoneFiles, 'min_records', 0)
+    return ZoneFiles()
+
+
+def make_store(zone, count=3):
+    return ZoneStore.from_records(zone, [
+        PDNSRecord(zone, f'host{i}.{zone}', 300, 'A', f'192.0.2.{i % 256}')
+        for i in range(count)
+    ])
+
+
+def test_zone_files_save_load(zone_files):
+    store = make_store('example.com.')
+    assert zone_files.save('example.com.', 1, store)
+    assert list(zone_files.load('example.com.', 1)) == list(store)
+    assert zone_files.load('example.com.', 2) is None
+    assert zone_files.load('example.org.', 1) is None
+
+
+def test_zone_files_old_format(zone_files):
+    zone_files.save('example.com.', 1, make_store('example.com.'))
+    with open(zone_files._path('example.com.', 1), 'r+b') as f:
+        f.write(b'DINOZONE1\n')
+    assert zone_files.load('example.com.', 1) is None
+
+
+def test_zone_files_disabled(zone_files, settings):
+    settings.ZONE_FILE_CACHE_SIZE = 0
+    assert not zone_files.save('example.com.', 1, make_store('example.com.'))
+    assert zone_files.load('example.com.', 1) is None
+
+
+def test_zone_files_min_records(zone_files, mocker):
+    mocker.patch.object(ZoneFiles, 'min_records', 10)
+    assert not zone_files.save('example.com.', 1, make_store('example.com.'))
+
+
+def test_zone_files_too_large(zone_files, tmp_path):
+    assert not zone_files.save('example.com.', 1, make_store('example.com.', 50000))
+    assert os.listdir(tmp_path) == []
+
+
+def test_zone_files_old_versions_removed(zone_files, tmp_path):
+    zone_files.save('example.com.', 1, make_store('example.com.'))
+    zone_files.save('example.com.', 2, make_store('example.com.'))
+    assert zone_files.load('example.com.', 1) is None
+    assert zone_files.load('example.com.', 2) is not None
+    assert len(os.listdir(tmp_path)) == 1
+
+
+def test_zone_files_evict_least_recently_used(zone_files):
+    # about 300 kB each, three of them fit into 1 MB
+    zones = [f'zone{i}.example.' for i in range(4)]
+    for i, zone in enumerate(zones[:3]):
+        zone_files.save(zone, 1, make_store(zone, 4000))
+        os.utime(zone_files._path(zone, 1), (i, i))
+
+    # zone0 was used last, so zone1 is the least recently used one now
+    zone_files.load(zones[0], 1)
+    zone_files.save(zones[3], 1, make_store(zones[3], 4000))
+
+    assert [z for z in zones if zone_files.load(z, 1) is not None] == [zones[0], zones[2], zones[3]]
@@ -0,0 +1,154 @@
+import io
+import pickle
+
+import pytest
+from django.core.paginator import Paginator
+
+from ...record import PDNSRecord
+from ...zonestore import ZoneStore
+
+
+@pytest.fixture
+def records():
+    return [
+        PDNSRecord('example.com.', 'example.com.', 3600, 'SOA', 'ns1.example.com. hostmaster.example.com. 1 10800 3600 604800 3600'),
+        PDNSRecord('example.com.', 'www.example.com.', 300, 'A', '192.0.2.1'),
+        PDNSRecord('example.com.', 'www.example.com.', 300, 'A', '192.0.2.2'),
+        PDNSRecord('example.com.', 'www.example.com.', 300, 'AAAA', '2001:db8::1'),
+        PDNSRecord('example.com.', 'mail.example.com.', 600, 'A', '192.0.2.3'),
+        PDNSRecord('example.com.', 'txt.example.com.', 60, 'TXT', 'smörgåsbord'),
+    ]
+
+
+@pytest.fixture
+def store(records):
+    return ZoneStore.from_records('example.com.', records)
+
+
+def test_zonestore(store, records):
+    assert len(store) == len(records)
+    assert list(store) == records
+    assert store[1] == records[1]
+    assert store[-1] == records[-1]
+    assert store[1:3] == records[1:3]
+    assert store[::-2] == records[::-2]
+    with pytest.raises(IndexError):
+        store[len(records)]
+
+
+def test_zonestore_interned(store):
+    assert store._names == ['example.com.', 'www.example.com.', 'mail.example.com.', 'txt.example.com.']
+    assert store._rtypes == ['SOA', 'A', 'AAAA', 'TXT']
+
+
+def test_zonestore_empty():
+    store = ZoneStore.from_records('example.com.', [])
+    assert len(store) == 0
+    assert list(store) == []
+
+
+def test_zonestore_filter(store, records):
+    assert list(store.filter(name='www.example.com.')) == records[1:4]
+    assert list(store.filter(rtype='A')) == [records[1], records[2], records[4]]
+    assert list(store.filter(name='www.example.com.', rtype='A')) == records[1:3]
+    assert list(store.filter(name='missing.example.com.')) == []
+
+
+def test_zonestore_select(store, records, mocker):
+    match = mocker.Mock(side_effect=lambda name, rtype: 'www' in name)
+    selection = store.select(match)
+    assert list(selection) == records[1:4]
+    assert selection[0] == records[1]
+    assert selection[1:] == records[2:4]
+    assert match.call_count == 5  # once per distinct name and rtype
+
+
+def test_zonestore_index():
+    records = [
+        PDNSRecord('example.com.', name, 300, rtype, str(i))
+        for i, (name, rtype) in enumerate([
+            ('a.example.com.', 'A'), ('b.example.com.', 'A'), ('a.example.com.', 'TXT'),
+            ('a.example.com.', 'A'), ('b.example.com.', 'MX'),
+        ])
+    ]
+    store = ZoneStore.from_records('example.com.', records)
+
+    # name-only and rtype-only results merge several runs, still in zone order
+    assert [r.content for r in store.filter(name='a.example.com.')] == ['0', '2', '3']
+    assert [r.content for r in store.filter(rtype='A')] == ['0', '1', '3']
+    assert [r.content for r in store.filter(name='a.example.com.', rtype='A')] == ['0', '3']
+    assert list(store.filter(name='b.example.com.', rtype='TXT')) == []
+    assert list(store.filter(rtype='AAAA')) == []
+    assert list(store.filter()) == records
+
+
+def test_zonestore_index_compact():
+    records = [
+        PDNSRecord('example.com.', f'host{i % 500}.example.com.', 300, 'A' if i % 3 else 'TXT', str(i))
+        for i in range(3000)
+    ]
+    store = ZoneStore.from_records('example.com.', records)
+
+    # a few flat arrays, counted in nbytes
+    assert store._index.nbytes < 16 * len(store)
+    assert store._index.nbytes < store.nbytes
+    assert [r.content for r in store.filter(name='host7.example.com.', rtype='TXT')] == [
+        r.content for r in records if r.name == 'host7.example.com.' and r.rtype == 'TXT'
+    ]
+
+
+def test_zonestore_pickle_index(store, records):
+    loaded = pickle.loads(pickle.dumps(store))
+    assert list(loaded.filter(name='www.example.com.')) == records[1:4]
+
+    # stores pickled before the index was part of them
+    state = store.__dict__.copy()
+    del state['_index']
+    old = ZoneStore.__new__(ZoneStore)
+    old.__setstate__(state)
+    assert list(old.filter(name='www.example.com.')) == records[1:4]
+
+
+def test_zonestore_paginator(store, records):
+    paginator = Paginator(store, 4)
+    assert paginator.count == len(records)
+    assert list(paginator.page(2).object_list) == records[4:]
+
+
+def test_zonestore_pickle(store):
+    assert list(pickle.loads(pickle.dumps(store))) == list(store)
+
+
+def test_zonestore_dump_load(store, records):
+    f = io.BytesIO()
+    store.dump(f)
+    loaded = ZoneStore.load(f.getvalue())
+
+    assert loaded.zone == 'example.com.'
+    assert list(loaded) == records
+    assert loaded[-1] == records[-1]
+    assert list(loaded.filter(name='www.example.com.', rtype='A')) == records[1:3]
+    assert list(loaded.filter(name='www.example.com.')) == records[1:4]
+    assert list(loaded.filter(rtype='A')) == [records[1], records[2], records[4]]
+    assert loaded.select(lambda name, rtype: rtype == 'TXT')[0] == records[-1]
+
+
+def test_zonestore_dump_load_empty():
+    f = io.BytesIO()
+    ZoneStore('example.com.').dump(f)
+    assert list(ZoneStore.load(f.getvalue())) == []
+
+
+def test_zonestore_load_invalid():
+    with pytest.raises(ValueError):
+        ZoneStore.load(b'not a zone store at all')
+
+
+def test_zonestore_nbytes(store):
+    f = io.BytesIO()
+    store.dump(f)
+    loaded = ZoneStore.load(f.getvalue())
+
+    assert store.nbytes > len(store._contents)
+    # names of loaded stores are not separate objects
+    assert len(store._contents) < loaded.nbytes < store.nbytes
@@ -0,0 +1,123 @@
+import glob
+import hashlib
+import logging
+import mmap
+import os
+import threading
+
+from django.conf import settings
+
+from .zonestore import ZoneStore
+
+logger = logging.getLogger(__name__)
+
+
+class ZoneFiles():
+    """
+    Parsed zones written to ZONE_FILE_DIR, one file per zone and version, and
+    memory-mapped read-only by all processes: the pages are shared instead of
+    every worker downloading, parsing and keeping its own copy.
+
+    Files are never changed once written. Their mtime is bumped on access and
+    the least recently used ones are removed as soon as all files take up
+    more than ZONE_FILE_CACHE_SIZE megabytes.
+    """
+
+    SUFFIX = '.zone'
+
+    # smaller zones are cheap to parse and kept in the record cache as-is
+    min_records = 1000
+
+    @property
+    def enabled(self):
+        return settings.ZONE_FILE_CACHE_SIZE > 0
+
+    @property
+    def budget(self):
+        return settings.ZONE_FILE_CACHE_SIZE * 1024 * 1024
+
+    def _prefix(self, zone):
+        # zone names may contain anything, including slashes
+        return os.path.join(settings.ZONE_FILE_DIR, hashlib.sha1(zone.encode()).hexdigest())
+
+    def _path(self, zone, version):
+        return f'{self._prefix(zone)}-{version}{self.SUFFIX}'
+
+    def save(self, zone, version, store):
+        """ write store to disk, returns false if it is not worth it or too large """
+        if not self.enabled or len(store) < self.min_records:
+            return False
+
+        os.makedirs(settings.ZONE_FILE_DIR, exist_ok=True)
+        path = self._path(zone, version)
+        tmp = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+
+        try:
+            with open(tmp, 'wb') as f:
+                store.dump(f)
+            if os.path.getsize(tmp) > self.budget:
+                return False
+            # others see the complete file or none at all
+            os.replace(tmp, path)
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+
+        # older versions of the zone will not be asked for again
+        for other in glob.glob(f'{glob.escape(self._prefix(zone))}-*{self.SUFFIX}'):
+            if other != path:
+                self._remove(other)
+
+        self._evict(keep=path)
+        return True
+
+    def load(self, zone, version):
+        """
+        map the store of zone at version, None if there is none (anymore).
+        Mapped stores are kept by RecordCache, not here.
+        """
+        if not self.enabled:
+            return None
+
+        path = self._path(zone, version)
+
+        try:
+            os.utime(path)
+            with open(path, 'rb') as f:
+                # the mapping stays valid after closing the file, even if the
+                # file gets removed.
+                return ZoneStore.load(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+        except FileNotFoundError:
+            return None
+        except ValueError:
+            # written by an older version of dino, the record cache has them too
+            logger.info(f'ignoring zone file {path} of an unknown format')
+            return None
+
+    def _remove(self, path):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass  # removed by another process
+
+    def _evict(self, keep):
+        files = []
+        for path in glob.glob(os.path.join(glob.escape(settings.ZONE_FILE_DIR), f'*{self.SUFFIX}')):
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in files)
+
+        for _, size, path in sorted(files):
+            if total <= self.budget:
+                break
+            if path != keep:
+                logger.debug(f'evicting zone file {path}')
+                self._remove(path)
+                total -= size
+
+
+zone_files = ZoneFiles()
@@ -0,0 +1,364 @@
+import json
+import sys
+from array import array
+from bisect import bisect_left
+from collections.abc import Sequence
+from itertools import accumulate, chain
+
+from .record import PDNSRecord
+
+MAGIC = b'DINOZONE2\n'
+
+
+def _align(pos):
+    return (pos + 7) // 8 * 8
+
+
+def _nbytes(column):
+    if hasattr(column, 'nbytes'):
+        return column.nbytes
+    if isinstance(column, list):
+        return sys.getsizeof(column) + sum(sys.getsizeof(value) for value in column)
+    return memoryview(column).nbytes
+
+
+class _StringTable(Sequence):
+    """ strings stored in one UTF-8 buffer with offsets, as read by ZoneStore.load() """
+
+    def __init__(self, buffer, offsets):
+        self._buffer = buffer
+        self._offsets = offsets
+
+    def __len__(self):
+        return len(self._offsets) - 1
+
+    def __getitem__(self, i):
+        return str(self._buffer[self._offsets[i]:self._offsets[i + 1]], 'utf-8')
+
+    @property
+    def nbytes(self):
+        return _nbytes(self._buffer) + _nbytes(self._offsets)
+
+
+class ZoneIndex():
+    """
+    Positions of the records of a ZoneStore by name, rtype and both, kept in
+    a few flat arrays, so it stays small compared to the store and can be
+    dumped and mapped along with it:
+
+    - names: name ids, sorted by name, to look names up by bisection
+    - keys: the distinct (name id, rtype id) pairs as name_id << 16 | rtype_id,
+      sorted
+    - starts: the positions of the records of the n-th pair are
+      order[starts[n]:starts[n + 1]], in zone order
+    """
+
+    def __init__(self, store, names, keys, starts, order):
+        self.store = store
+        self.names = names
+        self.keys = keys
+        self.starts = starts
+        self.order = order
+
+    @classmethod
+    def build(cls, store):
+        keys_by_position = array('Q', (
+            name_id << 16 | rtype_id
+            for name_id, rtype_id in zip(store._name_ids, store._rtype_ids)
+        ))
+        # sorting is stable, so the positions of each pair stay in zone order
+        order = array('I', sorted(range(len(keys_by_position)), key=keys_by_position.__getitem__))
+        keys = array('Q')
+        starts = array('I')
+
+        for i, position in enumerate(order):
+            key = keys_by_position[position]
+            if not keys or keys[-1] != key:
+                keys.append(key)
+                starts.append(i)
+        starts.append(len(order))
+
+        names = array('I', sorted(range(len(store._names)), key=store._names.__getitem__))
+        return cls(store, names, keys, starts, order)
+
+    @property
+    def nbytes(self):
+        return sum(_nbytes(column) for column in (self.names, self.keys, self.starts, self.order))
+
+    def name_id(self, name):
+        names = self.store._names
+        lo, hi = 0, len(self.names)
+
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if names[self.names[mid]] < name:
+                lo = mid + 1
+            else:
+                hi = mid
+
+        if lo < len(self.names) and names[self.names[lo]] == name:
+            return self.names[lo]
+        return None
+
+    def rtype_id(self, rtype):
+        try:
+            return self.store._rtypes.index(rtype)
+        except ValueError:
+            return None
+
+    def pairs(self):
+        """ (name id, rtype id, n) for the n-th pair, for all pairs """
+        return ((key >> 16, key & 0xffff, n) for n, key in enumerate(self.keys))
+
+    def run(self, n):
+        """ positions of the records of the n-th pair """
+        return self.order[self.starts[n]:self.starts[n + 1]]
+
+    @staticmethod
+    def merge(runs):
+        """ positions of all runs, in zone order """
+        if not runs:
+            return array('I')
+        if len(runs) == 1:
+            return runs[0]
+        # sorting is linear on runs which are already sorted
+        return array('I', sorted(chain.from_iterable(runs)))
+
+    def positions(self, name, rtype):
+        name_id, rtype_id = self.name_id(name), self.rtype_id(rtype)
+        if name_id is None or rtype_id is None:
+            return array('I')
+
+        key = name_id << 16 | rtype_id
+        n = bisect_left(self.keys, key)
+        if n < len(self.keys) and self.keys[n] == key:
+            return self.run(n)
+        return array('I')
+
+    def name_positions(self, name):
+        name_id = self.name_id(name)
+        if name_id is None:
+            return array('I')
+
+        # pairs are sorted by name id first
+        first = bisect_left(self.keys, name_id << 16)
+        last = bisect_left(self.keys, (name_id + 1) << 16)
+        return self.merge([self.run(n) for n in range(first, last)])
+
+    def rtype_positions(self, rtype):
+        rtype_id = self.rtype_id(rtype)
+        return self.merge([
+            self.run(n) for _, other_id, n in self.pairs()
+            if other_id == rtype_id
+        ])
+
+
+class ZoneStore(Sequence):
+    """
+    The records of a zone, stored column-wise to keep huge zones small: names
+    and rtypes are stored once and referenced by integer ids, TTLs in an
+    array and all contents in a single UTF-8 buffer with offsets.
+
+    Records are read as PDNSRecords, created on access. Filtering uses a
+    ZoneIndex, built along with the store, and evaluates conditions once per
+    distinct name and rtype instead of once per record.
+    """
+
+    def __init__(self, zone):
+        self.zone = zone
+        self._names = []
+        self._rtypes = []
+        self._name_ids = array('I')
+        self._rtype_ids = array('H')
+        self._ttls = array('I')
+        self._offsets = array('Q', [0])
+        self._contents = b''
+        self._index = ZoneIndex.build(self)
+
+    @classmethod
+    def from_records(cls, zone, records):
+        store = cls(zone)
+        name_ids = {}
+        rtype_ids = {}
+        contents = []
+        offset = 0
+
+        for r in records:
+            name_id = name_ids.get(r.name)
+            if name_id is None:
+                name_id = name_ids[r.name] = len(store._names)
+                store._names.append(r.name)
+
+            rtype_id = rtype_ids.get(r.rtype)
+            if rtype_id is None:
+                rtype_id = rtype_ids[r.rtype] = len(store._rtypes)
+                store._rtypes.append(r.rtype)
+
+            content = r.content.encode()
+            offset += len(content)
+            contents.append(content)
+
+            store._name_ids.append(name_id)
+            store._rtype_ids.append(rtype_id)
+            store._ttls.append(r.ttl)
+            store._offsets.append(offset)
+
+        store._contents = b''.join(contents)
+        store._index = ZoneIndex.build(store)
+        return store
+
+    def dump(self, f):
+        """ write the store to a binary file, to be read by load() """
+        names = [name.encode() for name in self._names]
+        sections = [
+            ('name_ids', self._name_ids),
+            ('rtype_ids', self._rtype_ids),
+            ('ttls', self._ttls),
+            ('offsets', self._offsets),
+            ('name_offsets', array('Q', accumulate([0] + [len(name) for name in names]))),
+            ('names', b''.join(names)),
+            ('contents', self._contents),
+            ('index_names', self._index.names),
+            ('index_keys', self._index.keys),
+            ('index_starts', self._index.starts),
+            ('index_order', self._index.order),
+        ]
+        header = json.dumps({
+            'zone': self.zone,
+            'rtypes': self._rtypes,
+            'sections': [
+                (name, getattr(data, 'typecode', 'B'), len(data))
+                for name, data in sections
+            ],
+        }).encode()
+
+        f.write(MAGIC)
+        f.write(len(header).to_bytes(8, 'little'))
+        f.write(header)
+        pos = len(MAGIC) + 8 + len(header)
+
+        # sections start 8 byte aligned, so they can be cast to arrays
+        for _, data in sections:
+            f.write(b'\0' * (_align(pos) - pos))
+            f.write(data)
+            pos = _align(pos) + len(memoryview(data).cast('B'))
+
+    @classmethod
+    def load(cls, buffer):
+        """
+        read a store written by dump() from a buffer (e.g. an mmap) without
+        copying it, the buffer must thus not be changed or closed.
+        """
+        view = memoryview(buffer)
+        if bytes(view[:len(MAGIC)]) != MAGIC:
+            raise ValueError('not a zone store')
+
+        pos = len(MAGIC) + 8
+        header_length = int.from_bytes(view[len(MAGIC):pos], 'little')
+        header = json.loads(bytes(view[pos:pos + header_length]))
+        pos += header_length
+
+        sections = {}
+        for name, typecode, length in header['sections']:
+            pos = _align(pos)
+            size = length * array(typecode).itemsize
+            sections[name] = view[pos:pos + size].cast(typecode)
+            pos += size
+
+        store = cls(header['zone'])
+        store._names = _StringTable(sections['names'], sections['name_offsets'])
+        store._rtypes = header['rtypes']
+        store._name_ids = sections['name_ids']
+        store._rtype_ids = sections['rtype_ids']
+        store._ttls = sections['ttls']
+        store._offsets = sections['offsets']
+        store._contents = sections['contents']
+        store._index = ZoneIndex(
+            store,
+            sections['index_names'],
+            sections['index_keys'],
+            sections['index_starts'],
+            sections['index_order'],
+        )
+        return store
+
+    @property
+    def nbytes(self):
+        """ estimated memory taken up by the store (or its mapping) and its index """
+        return self._index.nbytes + sum(_nbytes(column) for column in (
+            self._names, self._rtypes, self._name_ids, self._rtype_ids,
+            self._ttls, self._offsets, self._contents,
+        ))
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        if '_index' not in state:
+            # pickled before the index was part of the store
+            self._index = ZoneIndex.build(self)
+
+    def __len__(self):
+        return len(self._name_ids)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self._record(j) for j in range(*i.indices(len(self)))]
+
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError('record index out of range')
+
+        return self._record(i)
+
+    def __iter__(self):
+        return (self._record(i) for i in range(len(self)))
+
+    def _record(self, i):
+        return PDNSRecord(
+            self.zone,
+            self._names[self._name_ids[i]],
+            self._ttls[i],
+            self._rtypes[self._rtype_ids[i]],
+            str(self._contents[self._offsets[i]:self._offsets[i + 1]], 'utf-8'),
+        )
+
+    def select(self, match):
+        """ records for which match(name, rtype) is true, in zone order """
+        runs = [
+            self._index.run(n) for name_id, rtype_id, n in self._index.pairs()
+            if match(self._names[name_id], self._rtypes[rtype_id])
+        ]
+        return ZoneStoreSelection(self, ZoneIndex.merge(runs))
+
+    def filter(self, name=None, rtype=None):
+        """ records with the given name and rtype (if given) """
+        if name is not None and rtype is not None:
+            positions = self._index.positions(name, rtype)
+        elif name is not None:
+            positions = self._index.name_positions(name)
+        elif rtype is not None:
+            positions = self._index.rtype_positions(rtype)
+        else:
+            positions = array('I', range(len(self)))
+
+        return ZoneStoreSelection(self, positions)
+
+
+class ZoneStoreSelection(Sequence):
+    """ some of the records of a ZoneStore, as returned by ZoneStore.select() """
+
+    def __init__(self, store, indices):
+        self.store = store
+        self._indices = indices
+
+    def __len__(self):
+        return len(self._indices)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self.store._record(j) for j in self._indices[i]]
+
+        return self.store._record(self._indices[i])
+
+    def __iter__(self):
+        return (self.store._record(i) for i in self._indices)
@@ -14,6 +14,7 @@ import os
 import sys
 
 import dj_database_url
+from dino.common.cache_url import parse_cache_url
 from dino.common.config import Config
 
 env_files = [
@@ -34,7 +35,12 @@ DEFAULT_BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 BASE_DIR = cfg.get(
     'BASE_DIR', DEFAULT_BASE_DIR, example='/opt/dino',
     display_default='.../lib/python3.x/site-packages/dino/',
-    doc='Existing directory for dino to write internal data to. It must thus be created beforehand and be writeable by the user you use to run dino. It is currently only used to store the SQLite database (if used), but may contain other data in future releases. Note that this directory must **not** be accssible publicly.'
+    doc='Existing directory for dino to write internal data to. It must thus be created beforehand and be writeable by the user you use to run dino. It is currently used to store the SQLite database and cache (if used), but may contain other data in future releases. Note that this directory must **not** be accssible publicly.'
+)
+LOCK_DIR = cfg.get(
+    'LOCK_DIR', os.path.join(BASE_DIR, 'locks'),
+    display_default='$DINO_BASE_DIR/locks',
+    doc='Directory for lock files, which keep processes from e.g. syncing the zone list at the same time. Must be writable by all dino processes.',
 )
 
 SECRET_KEY = cfg.get(
@@ -62,6 +68,26 @@ PDNS_APIKEY = cfg.get(
     example='wooviex7ui0Eiy2Gohth4foovoob5Eip',
     doc='PowerDNS API key from pdns.conf.'
 )
+PDNS_SERVER_ID = cfg.get(
+    'PDNS_SERVER_ID', 'localhost',
+    doc='ID of the PowerDNS server to manage, as listed in ``/api/v1/servers``. PowerDNS Authoritative always calls itself ``localhost``.'
+)
+PDNS_POOL_SIZE = cfg.get(
+    'PDNS_POOL_SIZE', 10, cast=int,
+    doc='Maximum number of connections to the PowerDNS API to keep open per process. Requests exceeding this number wait for a free connection.'
+)
+PDNS_KEEPALIVE = cfg.get(
+    'PDNS_KEEPALIVE', 60, cast=int,
+    doc='Seconds to keep idle connections to the PowerDNS API open for reuse. Should not exceed the keep-alive timeout of the PowerDNS webserver or any proxy in between.'
+)
+PDNS_CONNECT_TIMEOUT = cfg.get(
+    'PDNS_CONNECT_TIMEOUT', 5, cast=int,
+    doc='Seconds to wait for a connection to the PowerDNS API to be established.'
+)
+PDNS_READ_TIMEOUT = cfg.get(
+    'PDNS_READ_TIMEOUT', 60, cast=int,
+    doc='Seconds to wait for the PowerDNS API to respond to a request. Exporting large zones may take a while.'
+)
 
 # Application definition
 
@@ -120,6 +146,8 @@ MIDDLEWARE = [
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'csp.middleware.CSPMiddleware',
+    'dino.pdns_api.middleware.SingleFlightMiddleware',
+    'dino.common.cachestats.CacheStatsMiddleware',
 ]
 
 ROOT_URLCONF = 'dino.urls'
@@ -148,7 +176,7 @@ WSGI_APPLICATION = 'dino.wsgi.application'
 # https://django-allauth.readthedocs.io/en/latest/
 
 AUTHENTICATION_BACKENDS = (
-    'rules.permissions.ObjectPermissionBackend',
+    'dino.tenants.backends.MemoizedPermissionBackend',
     'django.contrib.auth.backends.ModelBackend',
     'allauth.account.auth_backends.AuthenticationBackend',
 )
@@ -262,6 +290,11 @@ LOGGING = {
         },
     },
     'loggers': {
+        'dino.common.cachestats': {
+            'handlers': ['console'],
+            'level': 'DEBUG',
+            'propagate': True,
+        },
         'rules': {
             'handlers': ['console'],
             'level': 'DEBUG',
@@ -271,6 +304,63 @@ LOGGING = {
 }
 
 
+# Caching
+# https://docs.djangoproject.com/en/2.1/topics/cache/
+
+default_cache_url = 'file://' + os.path.join(BASE_DIR, 'cache')
+cache_url = cfg.get(
+    'CACHE_URL', default_cache_url,
+    display_default='file://$DINO_BASE_DIR/cache',
+    example='memcached://127.0.0.1:11211',
+    doc='Cache to store shared data like permissions and zone records in. Supported schemes are ``locmem://`` (per process), ``file:///path``, ``db://tablename`` (run ``createcachetable`` first), ``memcached://host:port``, ``pylibmc://host:port`` and ``redis://host:port/db`` (requires django-redis). When running multiple worker processes, use any but ``locmem://``, so they share their cache. ``timeout`` and ``key_prefix`` can be given in the query string, e.g. ``?key_prefix=dino``. File caches keep up to 10000 entries by default (``?max_entries=...``).',
+)
+RECORD_CACHE = 'records'
+record_cache_url = cfg.get(
+    'RECORD_CACHE_URL', cache_url,
+    display_default='$DINO_CACHE_URL',
+    example='file:///var/cache/dino/records?max_entries=1000',
+    doc='Cache to store zone records in, using the same format as ``DINO_CACHE_URL``. Records of large zones take up a lot of space, so it may make sense to keep them apart from other cached data. File caches shared with ``DINO_CACHE_URL`` use its subdirectory ``records``, so neither culls the entries of the other.',
+)
+RECORD_CACHE_TTL = cfg.get(
+    'RECORD_CACHE_TTL', 30, cast=int,
+    doc='Seconds to show cached zone records without asking PowerDNS for changes. Afterwards, cached records are still shown, but refreshed in the background if the zone serial changed. Changes made through dino are visible immediately.',
+)
+RECORD_CACHE_STALE_TTL = cfg.get(
+    'RECORD_CACHE_STALE_TTL', 3600, cast=int,
+    doc='Seconds after which cached zone records are discarded entirely. Changes made outside of dino without increasing the zone serial may be shown only after this time.',
+)
+RECORD_CACHE_LOCAL_SIZE = cfg.get(
+    'RECORD_CACHE_LOCAL_SIZE', 128, cast=int,
+    doc='Megabytes of memory each dino process may use to keep zone records, so they need not be read from ``DINO_RECORD_CACHE_URL`` on every request. The least recently used zones are dropped first.',
+)
+CACHE_STATS_INTERVAL = cfg.get(
+    'CACHE_STATS_INTERVAL', 3600, cast=int,
+    doc='Seconds between two log messages of each dino process about the caches it keeps, like hits, misses and memory used by ``DINO_RECORD_CACHE_LOCAL_SIZE``. Set to 0 to disable them.',
+)
+ZONE_FILE_DIR = cfg.get(
+    'ZONE_FILE_DIR', os.path.join(BASE_DIR, 'zones'),
+    display_default='$DINO_BASE_DIR/zones',
+    doc='Directory to store the parsed records of large zones in. The files are memory-mapped and thus shared by all dino processes, instead of each one keeping a copy of its own. Must be writable by all dino processes.',
+)
+ZONE_FILE_CACHE_SIZE = cfg.get(
+    'ZONE_FILE_CACHE_SIZE', 1024, cast=int,
+    doc='Megabytes of disk space to use in ``DINO_ZONE_FILE_DIR`` at most. The least recently used zones are removed first. The records are stored in ``DINO_RECORD_CACHE_URL`` as well, so hosts sharing it but not the directory each write their own files. Set to 0 to read all records from ``DINO_RECORD_CACHE_URL``.',
+)
+
+try:
+    CACHES = {
+        'default': parse_cache_url(cache_url),
+        RECORD_CACHE: {
+            'TIMEOUT': RECORD_CACHE_STALE_TTL,
+            **parse_cache_url(record_cache_url),
+        },
+    }
+    if record_cache_url == cache_url and cache_url.startswith('file:'):
+        CACHES[RECORD_CACHE]['LOCATION'] = os.path.join(CACHES[RECORD_CACHE]['LOCATION'], 'records')
+except ValueError as exc:
+    cfg.add_error(f'Configuration value CACHE_URL/RECORD_CACHE_URL was invalid: {exc}')
+
+
 # Custom Settings
 ENABLE_EMAIL_SIGNUP = cfg.get(
     'ENABLE_EMAIL_SIGNUP', False, cast=bool,
@@ -287,6 +377,14 @@ VALID_SIGNUP_DOMAINS = cfg.get(
     example='company.com,company.internal',
     doc='If ``DINO_ENABLE_EMAIL_SIGNUP`` is enabled, restrict creation of new users to the given domains. Any user, who can receive mail at a whitelisted domain will then be able to create a permissionless account without any prior authentication. Accounts need to be activated by verifiying the email address, though.'
 )
+ZONE_SYNC_INTERVAL = cfg.get(
+    'ZONE_SYNC_INTERVAL', 300, cast=int,
+    doc='Seconds between two syncs of the zone list from PowerDNS, done by the ``synczones`` command. Zones created through dino are available right away.',
+)
+ZONE_SYNC_RECORDS = cfg.get(
+    'ZONE_SYNC_RECORDS', True, cast=bool,
+    doc='Let the ``synczones`` command also copy the records of all zones changed since the last sync, which enables searching records across zones. The first sync fetches the records of every zone.',
+)
 ZONE_DEFAULT_KIND = cfg.get(
     'ZONE_DEFAULT_KIND', 'Native',
     doc='PowerDNS kind to set for new zones, may be Native, Master or Slave. See `PowerDNS Docs <see https://doc.powerdns.com/authoritative/http-api/zone.html#zone>`_.',
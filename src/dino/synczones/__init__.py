@@ -0,0 +1 @@
+default_app_config = 'dino.synczones.apps.SyncZonesConfig'
@@ -2,4 +2,7 @@ from django.apps import AppConfig
 
 
 class SyncZonesConfig(AppConfig):
-    name = 'synczones'
+    name = 'dino.synczones'
+
+    def ready(self):
+        from . import signals  # noqa
@@ -0,0 +1,46 @@
+import logging
+import time
+
+import requests
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from dino.pdns_api import PDNSError
+from dino.synczones.sync import sync_records, sync_zones
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = 'Periodically copy the list of zones from PowerDNS to the database.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interval', type=int, default=settings.ZONE_SYNC_INTERVAL, help='Seconds to wait between two syncs.')
+        parser.add_argument('--once', action='store_true', help='Sync once and exit, e.g. to run from cron.')
+
+    def handle(self, *args, **options):
+        while True:
+            try:
+                changes = sync_zones()
+                self.stdout.write(
+                    f'zones synced: {len(changes.added)} added, {len(changes.updated)} updated, '
+                    f'{len(changes.removed)} removed'
+                )
+
+                if settings.ZONE_SYNC_RECORDS:
+                    self.stdout.write(f'records synced: {sync_records()} zones')
+            except (PDNSError, requests.RequestException) as e:
+                if options['once']:
+                    raise
+                self.stderr.write(f'could not sync zones: {e}')
+            except Exception as e:
+                # e.g. the database went away, keep going and retry later
+                if options['once']:
+                    raise
+                logger.exception('could not sync zones')
+                self.stderr.write(f'could not sync zones: {e}')
+
+            if options['once']:
+                break
+
+            time.sleep(options['interval'])
@@ -0,0 +1,20 @@
+# Generated by Django 2.2.28 on 2026-10-17 06:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('synczones', '0002_punycode'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SyncStatus',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('last_sync', models.DateTimeField(null=True)),
+            ],
+        ),
+    ]
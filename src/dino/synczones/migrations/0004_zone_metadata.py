@@ -0,0 +1,38 @@
+# Generated by Django 2.2.28 on 2026-10-17 06:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('synczones', '0003_syncstatus'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='zone',
+            name='kind',
+            field=models.CharField(blank=True, db_index=True, max_length=16),
+        ),
+        migrations.AddField(
+            model_name='zone',
+            name='last_changed',
+            field=models.DateTimeField(db_index=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='zone',
+            name='masters',
+            field=models.TextField(blank=True),
+        ),
+        migrations.AddField(
+            model_name='zone',
+            name='record_count',
+            field=models.IntegerField(db_index=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='zone',
+            name='serial',
+            field=models.BigIntegerField(db_index=True, null=True),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 2.2.28 on 2026-10-17 06:15
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('synczones', '0004_zone_metadata'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='zone',
+            name='records_serial',
+            field=models.BigIntegerField(null=True),
+        ),
+        migrations.CreateModel(
+            name='Record',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(db_index=True, max_length=254)),
+                ('rtype', models.CharField(db_index=True, max_length=10)),
+                ('ttl', models.IntegerField()),
+                ('content', models.TextField()),
+                ('content_prefix', models.CharField(db_index=True, max_length=191)),
+                ('zone', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='records', to='synczones.Zone')),
+            ],
+        ),
+    ]
@@ -1,15 +1,207 @@
-from django.db import models
+from collections import namedtuple
+
+from django.core.cache import cache
+from django.db import connection, models, transaction
+from django.utils import timezone
+
+ZoneChanges = namedtuple('ZoneChanges', 'added updated removed')
+
+
+def _create_batch_size(model, objs, batch_size):
+    """
+    batch_size for bulk_create, capped to what the database supports (e.g.
+    999 variables per query in SQLite). Django 2.2 does not do so itself.
+    """
+    return min(batch_size, connection.ops.bulk_batch_size(model._meta.concrete_fields, objs) or batch_size)
 
 
 class Zone(models.Model):
+    # fields copied from PowerDNS by import_from_powerdns
+    SYNCED_FIELDS = ('serial', 'kind', 'masters')
+
     name = models.CharField(primary_key=True, max_length=254)
+    serial = models.BigIntegerField(null=True, db_index=True)
+    kind = models.CharField(max_length=16, blank=True, db_index=True)
+    masters = models.TextField(blank=True)  # comma-separated
+    # set whenever the records of the zone are fetched from PowerDNS
+    record_count = models.IntegerField(null=True, db_index=True)
+    # last time any of the synced fields changed in PowerDNS (as noticed by a sync)
+    last_changed = models.DateTimeField(null=True, db_index=True)
+    # serial of the records in the Record table
+    records_serial = models.BigIntegerField(null=True)
+
+    COUNT_CACHE_KEY = 'dino:zones:count'
 
     def __str__(self):
         return f'Zone {self.name}'
 
+    @classmethod
+    def approximate_count(cls):
+        """ number of all zones, without counting them on every call """
+        return cache.get_or_set(cls.COUNT_CACHE_KEY, cls.objects.count, 300)
+
+    @property
+    def master_list(self):
+        return self.masters.split(',') if self.masters else []
+
     @staticmethod
-    def import_from_powerdns(zones):
+    def _from_powerdns(zone):
+        """
+        convert an entry of pdns.get_zones() to a (name, fields) tuple. Plain
+        zone names are accepted too, their fields are left alone.
+        """
+        if isinstance(zone, str):
+            return zone, None
+
+        return zone['name'], {
+            'serial': zone.get('serial'),
+            'kind': zone.get('kind') or '',
+            'masters': ','.join(zone.get('masters') or []),
+        }
+
+    @staticmethod
+    def import_from_powerdns(zones, known=None, batch_size=500):
+        """
+        Make the zone table match the given zones, by adding missing, updating
+        changed and removing vanished zones. Only zones in `known` (default:
+        all zones in the database) are considered for removal. Returns the
+        names of added, updated and removed zones.
+        """
+        zones = dict(Zone._from_powerdns(zone) for zone in zones)
+        existing = {
+            name: dict(zip(Zone.SYNCED_FIELDS, fields))
+            for name, *fields in Zone.objects.values_list('name', *Zone.SYNCED_FIELDS)
+        }
+        if known is None:
+            known = existing.keys()
+
+        now = timezone.now()
+        added = [
+            Zone(name=name, last_changed=now, **(fields or {}))
+            for name, fields in zones.items()
+            if name not in existing
+        ]
+        updated = [
+            Zone(name=name, last_changed=now, **fields)
+            for name, fields in zones.items()
+            if name in existing and fields is not None and fields != existing[name]
+        ]
+        removed = sorted((set(known) & existing.keys()) - zones.keys())
+
+        if not zones:
+            # an empty zone list is far more likely to be caused by a
+            # misconfiguration than by an empty PowerDNS. Keep all zones,
+            # including their tenant assignments.
+            removed = []
+
         Zone.objects.bulk_create(
-            (Zone(name=zone) for zone in zones),
+            added,
+            batch_size=_create_batch_size(Zone, added, batch_size),
             ignore_conflicts=True,
         )
+        Zone.objects.bulk_update(updated, Zone.SYNCED_FIELDS + ('last_changed',), batch_size=batch_size)
+
+        for i in range(0, len(removed), batch_size):
+            Zone.objects.filter(name__in=removed[i:i + batch_size]).delete()
+
+        if added or removed:
+            cache.delete(Zone.COUNT_CACHE_KEY)
+
+        return ZoneChanges(
+            added=[zone.name for zone in added],
+            updated=[zone.name for zone in updated],
+            removed=removed,
+        )
+
+
+class Record(models.Model):
+    """
+    Copy of a zone's records, to search across zones. It is updated by
+    sync_records() for zones whose serial changed and when records are
+    changed through dino.
+    """
+    # longest content prefix, which can be indexed by all databases
+    CONTENT_PREFIX_LENGTH = 191
+
+    zone = models.ForeignKey(Zone, on_delete=models.CASCADE, related_name='records')
+    name = models.CharField(max_length=254, db_index=True)
+    rtype = models.CharField(max_length=10, db_index=True)
+    ttl = models.IntegerField()
+    content = models.TextField()
+    content_prefix = models.CharField(max_length=CONTENT_PREFIX_LENGTH, db_index=True)
+
+    def __str__(self):
+        return f'Record {self.name} {self.rtype} {self.content}'
+
+    def save(self, *args, **kwargs):
+        self.content_prefix = self.content[:self.CONTENT_PREFIX_LENGTH]
+        super().save(*args, **kwargs)
+
+    @classmethod
+    def _create(cls, zone, records, batch_size=1000):
+        objs = [
+            cls(
+                zone_id=zone,
+                name=r['name'],
+                rtype=r['rtype'],
+                ttl=r['ttl'],
+                content=r['content'],
+                content_prefix=r['content'][:cls.CONTENT_PREFIX_LENGTH],
+            )
+            for r in records
+        ]
+        cls.objects.bulk_create(objs, batch_size=_create_batch_size(cls, objs, batch_size))
+
+    @classmethod
+    def replace_zone(cls, zone, serial, records):
+        """ replace all records of zone, if they are not at serial already """
+        with transaction.atomic():
+            if not Zone.objects.filter(name=zone).exclude(records_serial=serial).update(records_serial=serial):
+                return
+
+            cls.objects.filter(zone_id=zone).delete()
+            cls._create(zone, records)
+
+    @classmethod
+    def replace_rrset(cls, zone, name, rtype, ttl, contents):
+        with transaction.atomic():
+            if not Zone.objects.filter(name=zone).exists():
+                return
+
+            cls.objects.filter(zone_id=zone, name=name, rtype=rtype).delete()
+            cls._create(zone, (
+                {'name': name, 'rtype': rtype, 'ttl': ttl, 'content': content}
+                for content in contents
+            ))
+
+    @classmethod
+    def search(cls, q):
+        """
+        find records whose name or content is q, or starts with q, if it ends
+        with a "*".
+        """
+        if q.endswith('*'):
+            q = q[:-1]
+            return cls.objects.filter(
+                models.Q(name__startswith=q) |
+                models.Q(content_prefix__startswith=q[:cls.CONTENT_PREFIX_LENGTH], content__startswith=q)
+            )
+
+        names = {q, q.rstrip('.') + '.'}
+        return cls.objects.filter(
+            models.Q(name__in=names) |
+            models.Q(content_prefix=q[:cls.CONTENT_PREFIX_LENGTH], content=q)
+        )
+
+
+class SyncStatus(models.Model):
+    """ single row, describing the last sync of zones from PowerDNS """
+    last_sync = models.DateTimeField(null=True)
+
+    def __str__(self):
+        return f'Zones last synced at {self.last_sync}'
+
+    @classmethod
+    def get(cls):
+        status, _ = cls.objects.get_or_create(pk=1)
+        return status
@@ -0,0 +1,19 @@
+from django.conf import settings
+from django.dispatch import receiver
+
+from dino.pdns_api.signals import records_changed, records_fetched
+
+from .models import Record, Zone
+
+
+@receiver(records_fetched)
+def update_record_count(sender, zone, serial, records, **kwargs):
+    Zone.objects.filter(name=zone).update(serial=serial, record_count=len(records))
+
+
+# whole zones are copied to the Record table by sync_records() only, keep up
+# with the changes made through dino in between.
+@receiver(records_changed)
+def update_rrset(sender, zone, name, rtype, ttl, contents, **kwargs):
+    if settings.ZONE_SYNC_RECORDS:
+        Record.replace_rrset(zone, name, rtype, ttl, contents)
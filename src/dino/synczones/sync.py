@@ -0,0 +1,67 @@
+import logging
+
+from django.db.models import F
+from django.utils import timezone
+
+from dino.common.locks import FileLock
+from dino.pdns_api import PDNSNotFoundException, pdns
+
+from .models import Record, SyncStatus, Zone, ZoneChanges
+
+logger = logging.getLogger(__name__)
+
+
+def sync_zones(if_never_synced=False):
+    """
+    copy the list of zones from PowerDNS to the database, returns the names of
+    added, updated and removed zones. Only one process syncs at a time, with
+    `if_never_synced`, waiting processes don't sync again.
+    """
+    with FileLock('sync_zones'):
+        status = SyncStatus.get()
+
+        if if_never_synced and status.last_sync is not None:
+            return ZoneChanges(added=[], updated=[], removed=[])
+
+        api = pdns()
+
+        # zones created through dino while the list is being fetched are
+        # missing from it, but must not be removed.
+        known = set(Zone.objects.values_list('name', flat=True))
+        changes = Zone.import_from_powerdns(api.get_zones(), known=known)
+
+        # the cached records of zones changed outside dino are outdated
+        for zone in changes.updated:
+            api.invalidate_records(zone)
+
+        status.last_sync = timezone.now()
+        status.save()
+
+        return changes
+
+
+def sync_records():
+    """
+    copy the records of all zones, whose serial changed since their records
+    have last been copied. Returns the number of synced zones.
+
+    The records are fetched past the record cache, most of these zones are
+    not looked at by anyone and would only push others out of the cache.
+    """
+    api = pdns()
+    zones = list(
+        Zone.objects
+        .filter(serial__isnull=False)
+        .exclude(records_serial=F('serial'))
+        .values_list('name', flat=True)
+    )
+
+    for zone in zones:
+        try:
+            serial, records = api.fetch_records(zone)
+        except PDNSNotFoundException:
+            logger.info(f'zone {zone} vanished while syncing records')
+        else:
+            Record.replace_zone(zone, serial, records)
+
+    return len(zones)
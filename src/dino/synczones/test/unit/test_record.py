@@ -0,0 +1,104 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from dino.pdns_api.signals import records_changed, records_fetched
+
+from ...models import Record, Zone
+
+
+def record(name, rtype, content, ttl=300):
+    return {'name': name, 'rtype': rtype, 'ttl': ttl, 'content': content}
+
+
+@pytest.fixture
+def zone(db):
+    return Zone.objects.create(name='example.com.', serial=1)
+
+
+def contents(**kwargs):
+    return sorted(Record.objects.filter(**kwargs).values_list('content', flat=True))
+
+
+def test_record_replace_zone(zone):
+    Record.replace_zone('example.com.', 1, [record('www.example.com.', 'A', '192.0.2.1')])
+    Record.replace_zone('example.com.', 2, [record('mail.example.com.', 'A', '192.0.2.2')])
+    assert contents() == ['192.0.2.2']
+    assert Zone.objects.get().records_serial == 2
+
+
+def test_record_replace_zone_same_serial(zone):
+    Record.replace_zone('example.com.', 1, [record('www.example.com.', 'A', '192.0.2.1')])
+    Record.replace_zone('example.com.', 1, [record('mail.example.com.', 'A', '192.0.2.2')])
+    assert contents() == ['192.0.2.1']
+
+
+def test_record_replace_zone_unknown(db):
+    Record.replace_zone('example.com.', 1, [record('www.example.com.', 'A', '192.0.2.1')])
+    assert not Record.objects.exists()
+
+
+def test_record_replace_rrset(zone):
+    Record.replace_zone('example.com.', 1, [
+        record('www.example.com.', 'A', '192.0.2.1'),
+        record('www.example.com.', 'AAAA', '2001:db8::1'),
+    ])
+    Record.replace_rrset('example.com.', 'www.example.com.', 'A', 60, ['192.0.2.3', '192.0.2.4'])
+    assert contents(rtype='A') == ['192.0.2.3', '192.0.2.4']
+    assert contents(rtype='AAAA') == ['2001:db8::1']
+
+    Record.replace_rrset('example.com.', 'www.example.com.', 'A', 60, [])
+    assert contents(rtype='A') == []
+
+
+def test_record_content_prefix(zone):
+    content = 'v=spf1 ' + 'a' * 300
+    Record.replace_zone('example.com.', 1, [record('example.com.', 'TXT', content)])
+    assert Record.objects.get().content_prefix == content[:Record.CONTENT_PREFIX_LENGTH]
+    assert Record.search(content).exists()
+    assert not Record.search(content[:200]).exists()
+
+
+@pytest.mark.parametrize('q,expected', [
+    ('192.0.2.10', ['www.example.com.']),
+    ('192.0.2.1', ['mail.example.com.']),
+    ('192.0.2.1*', ['mail.example.com.', 'www.example.com.']),
+    ('www.example.com', ['www.example.com.']),
+    ('www.example.com.', ['www.example.com.']),
+    ('www*', ['www.example.com.']),
+    ('example.com', []),
+])
+def test_record_search(zone, q, expected):
+    Record.replace_zone('example.com.', 1, [
+        record('www.example.com.', 'A', '192.0.2.10'),
+        record('mail.example.com.', 'A', '192.0.2.1'),
+    ])
+    assert sorted(Record.search(q).values_list('name', flat=True)) == expected
+
+
+def test_record_signals(zone):
+    Record.replace_zone('example.com.', 1, [record('www.example.com.', 'A', '192.0.2.1')])
+
+    # fetched zones are copied by sync_records(), not whenever they are fetched
+    records_fetched.send(sender=None, zone='example.com.', serial=2, records=[record('www.example.com.', 'AAAA', '2001:db8::1')])
+    assert contents() == ['192.0.2.1']
+
+    records_changed.send(sender=None, zone='example.com.', name='www.example.com.', rtype='A', ttl=300, contents=['192.0.2.1', '192.0.2.2'])
+    assert contents() == ['192.0.2.1', '192.0.2.2']
+
+
+def test_record_signals_disabled(zone, settings):
+    settings.ZONE_SYNC_RECORDS = False
+    records_changed.send(sender=None, zone='example.com.', name='www.example.com.', rtype='A', ttl=300, contents=['192.0.2.1'])
+    assert not Record.objects.exists()
+
+
+def test_record_replace_zone_batches(zone):
+    records = [record(f'host{i}.example.com.', 'A', '192.0.2.1') for i in range(1000)]
+
+    with CaptureQueriesContext(connection) as queries:
+        Record.replace_zone('example.com.', 1, records)
+
+    # all at once would exceed the variables allowed per query by SQLite
+    assert len([q for q in queries if q['sql'].startswith('INSERT')]) > 1
+    assert Record.objects.count() == 1000
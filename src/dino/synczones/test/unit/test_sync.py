@@ -0,0 +1,150 @@
+import pytest
+import requests
+from django.core.management import call_command
+from django.db import DatabaseError
+
+from dino.pdns_api import PDNSError, PDNSNotFoundException
+from dino.pdns_api.signals import records_fetched
+
+from ...models import Record, SyncStatus, Zone
+from ...sync import sync_records, sync_zones
+
+
+def record(name, rtype, content, ttl=300):
+    return {'name': name, 'rtype': rtype, 'ttl': ttl, 'content': content}
+
+
+@pytest.mark.django_db()
+def test_sync_zones(mock_pdns_get_zones):
+    assert SyncStatus.get().last_sync is None
+    assert len(sync_zones().added) == 502
+    assert SyncStatus.get().last_sync is not None
+    assert Zone.objects.filter(name='example.com.').exists()
+
+
+@pytest.mark.django_db()
+def test_sync_zones_if_never_synced(mock_pdns_get_zones):
+    sync_zones()
+    assert sync_zones(if_never_synced=True) == ([], [], [])
+    mock_pdns_get_zones.assert_called_once()
+
+
+@pytest.mark.django_db()
+def test_sync_zones_keeps_new_zones(mocker):
+    # zone created through dino after the zone list has been fetched
+    def get_zones():
+        Zone.objects.create(name='new.example.com.')
+        return ['example.com.']
+
+    Zone.objects.create(name='example.com.')
+    Zone.objects.create(name='gone.example.com.')
+    mocker.patch('dino.pdns_api.pdns.get_zones', side_effect=get_zones)
+    assert sync_zones() == ([], [], ['gone.example.com.'])
+    assert set(Zone.objects.values_list('name', flat=True)) == {'example.com.', 'new.example.com.'}
+
+
+@pytest.mark.django_db()
+def test_sync_zones_invalidates_records(mocker):
+    Zone.objects.create(name='example.com.', serial=1)
+    Zone.objects.create(name='example.org.', serial=1)
+    mocker.patch('dino.pdns_api.pdns.get_zones', return_value=[
+        {'name': 'example.com.', 'serial': 2, 'kind': '', 'masters': []},
+        {'name': 'example.org.', 'serial': 1, 'kind': '', 'masters': []},
+    ])
+    invalidate = mocker.patch('dino.pdns_api.pdns.invalidate_records')
+    sync_zones()
+    invalidate.assert_called_once_with('example.com.')
+
+
+@pytest.mark.django_db()
+def test_record_count():
+    Zone.objects.create(name='example.com.', serial=1)
+    records_fetched.send(sender=None, zone='example.com.', serial=3, records=[
+        record('www.example.com.', 'A', '192.0.2.1'),
+        record('www.example.com.', 'A', '192.0.2.2'),
+    ])
+    zone = Zone.objects.get()
+    assert (zone.serial, zone.record_count) == (3, 2)
+
+
+@pytest.mark.django_db()
+def test_synczones_command_once(mock_pdns_get_zones, mocker):
+    sleep = mocker.patch('time.sleep')
+    fetch_records = mocker.patch('dino.pdns_api.pdns.fetch_records', return_value=(1, []))
+    call_command('synczones', '--once')
+    mock_pdns_get_zones.assert_called_once()
+    assert fetch_records.call_count == 502
+    sleep.assert_not_called()
+    assert Zone.objects.filter(name='example.com.').exists()
+
+
+@pytest.mark.django_db()
+def test_synczones_command_no_records(mock_pdns_get_zones, mocker, settings):
+    settings.ZONE_SYNC_RECORDS = False
+    fetch_records = mocker.patch('dino.pdns_api.pdns.fetch_records')
+    call_command('synczones', '--once')
+    fetch_records.assert_not_called()
+
+
+@pytest.mark.django_db()
+def test_sync_records(mocker):
+    Zone.objects.create(name='example.com.', serial=2, records_serial=1)
+    Zone.objects.create(name='example.net.', serial=2)
+    Zone.objects.create(name='example.org.', serial=1, records_serial=1)
+    Zone.objects.create(name='example.info.')
+
+    def fetch_records(zone):
+        if zone == 'example.net.':
+            raise PDNSNotFoundException()
+        return 2, [record(f'www.{zone}', 'A', '192.0.2.1')]
+
+    mocker.patch('dino.pdns_api.pdns.fetch_records', side_effect=fetch_records)
+    assert sync_records() == 2
+    assert list(Record.objects.values_list('zone', flat=True)) == ['example.com.']
+    assert sync_records() == 1  # example.net.
+
+
+@pytest.mark.django_db()
+def test_synczones_command_once_error(mocker):
+    mocker.patch('dino.pdns_api.pdns.get_zones', side_effect=PDNSError('/', 500, 'broken'))
+    with pytest.raises(PDNSError):
+        call_command('synczones', '--once')
+
+
+@pytest.mark.django_db()
+def test_synczones_command_interval(mocker, capsys):
+    class Stop(Exception):
+        pass
+
+    get_zones = mocker.patch('dino.pdns_api.pdns.get_zones', side_effect=[
+        PDNSError('/', 500, 'broken'),
+        ['example.com.'],
+    ])
+    sleep = mocker.patch('time.sleep', side_effect=[None, Stop])
+
+    with pytest.raises(Stop):
+        call_command('synczones', '--interval', '42')
+
+    assert get_zones.call_count == 2
+    sleep.assert_called_with(42)
+    assert 'could not sync zones' in capsys.readouterr().err
+    assert Zone.objects.filter(name='example.com.').exists()
+
+
+@pytest.mark.django_db()
+@pytest.mark.parametrize('error', [
+    requests.ConnectionError('refused'),
+    DatabaseError('gone'),
+])
+def test_synczones_command_interval_error(mocker, capsys, error):
+    class Stop(BaseException):
+        pass
+
+    get_zones = mocker.patch('dino.pdns_api.pdns.get_zones', side_effect=[error, []])
+    mocker.patch('time.sleep', side_effect=[None, Stop])
+
+    with pytest.raises(Stop):
+        call_command('synczones')
+
+    assert get_zones.call_count == 2
+    assert 'could not sync zones' in capsys.readouterr().err
@@ -1,4 +1,6 @@
 import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 
 from ...models import Zone
 
@@ -21,3 +23,116 @@ def test_zone_import_from_powerdns():
         'example.org.',
         'example.co.uk.',
     } == set(Zone.objects.all().values_list('name', flat=True))
+
+
+@pytest.mark.django_db()
+def test_zone_import_from_powerdns_diff():
+    Zone.import_from_powerdns(['example.com.', 'example.org.'])
+    assert Zone.import_from_powerdns(['example.org.', 'example.net.']) == (['example.net.'], [], ['example.com.'])
+    assert {
+        'example.org.',
+        'example.net.',
+    } == set(Zone.objects.all().values_list('name', flat=True))
+
+
+@pytest.mark.django_db()
+def test_zone_import_from_powerdns_batches():
+    zones = [f'example{i}.com.' for i in range(25)]
+    assert len(Zone.import_from_powerdns(zones, batch_size=10).added) == 25
+    assert len(Zone.import_from_powerdns(zones[:3], batch_size=10).removed) == 22
+    assert Zone.objects.count() == 3
+
+
+@pytest.mark.django_db()
+def test_zone_import_from_powerdns_unchanged():
+    zones = [f'example{i}.com.' for i in range(100)]
+    Zone.import_from_powerdns(zones)
+
+    with CaptureQueriesContext(connection) as queries:
+        assert Zone.import_from_powerdns(reversed(zones)) == ([], [], [])
+
+    assert len(queries) == 1
+    assert queries[0]['sql'].startswith('SELECT')
+
+
+@pytest.mark.django_db()
+def test_zone_import_from_powerdns_removes_tenant_zones(tenant):
+    assert Zone.import_from_powerdns(['example.org.']).removed == ['example.com.']
+    assert not tenant.zones.exists()
+
+
+@pytest.mark.django_db()
+def test_zone_import_from_powerdns_empty():
+    Zone.import_from_powerdns(['example.com.'])
+    assert Zone.import_from_powerdns([]) == ([], [], [])
+    assert Zone.objects.filter(name='example.com.').exists()
+
+
+@pytest.mark.django_db()
+def test_zone_import_from_powerdns_known():
+    Zone.import_from_powerdns(['example.com.', 'example.org.'])
+    assert Zone.import_from_powerdns(['example.net.'], known={'example.com.'}) == (['example.net.'], [], ['example.com.'])
+    assert {
+        'example.org.',
+        'example.net.',
+    } == set(Zone.objects.all().values_list('name', flat=True))
+
+
+def zone(name, serial=1, kind='Native', masters=()):
+    return {'name': name, 'serial': serial, 'kind': kind, 'masters': list(masters)}
+
+
+@pytest.mark.django_db()
+def test_zone_import_from_powerdns_fields():
+    Zone.import_from_powerdns([zone('example.com.', kind='Slave', masters=['192.0.2.1', '192.0.2.2'])])
+    z = Zone.objects.get()
+    assert (z.serial, z.kind, z.master_list, z.record_count) == (1, 'Slave', ['192.0.2.1', '192.0.2.2'], None)
+    assert z.last_changed is not None
+
+
+@pytest.mark.django_db()
+def test_zone_import_from_powerdns_update():
+    Zone.import_from_powerdns([zone('example.com.'), zone('example.org.')])
+    last_changed = Zone.objects.get(name='example.org.').last_changed
+
+    changes = Zone.import_from_powerdns([zone('example.com.', serial=2), zone('example.org.')])
+    assert changes == ([], ['example.com.'], [])
+    assert Zone.objects.get(name='example.com.').serial == 2
+    assert Zone.objects.get(name='example.org.').last_changed == last_changed
+
+
+@pytest.mark.django_db()
+def test_zone_import_from_powerdns_unchanged_fields():
+    zones = [zone(f'example{i}.com.') for i in range(100)]
+    Zone.import_from_powerdns(zones)
+
+    with CaptureQueriesContext(connection) as queries:
+        assert Zone.import_from_powerdns(zones) == ([], [], [])
+
+    assert len(queries) == 1
+
+
+@pytest.mark.django_db()
+def test_zone_import_from_powerdns_insert_batches():
+    zones = [zone(f'example{i}.com.') for i in range(300)]
+
+    with CaptureQueriesContext(connection) as queries:
+        assert len(Zone.import_from_powerdns(zones, batch_size=50).added) == 300
+
+    assert len([q for q in queries if q['sql'].startswith('INSERT')]) == 6
+
+    # 500 zones at once would exceed the variables allowed per query by SQLite
+    zones = [zone(f'example{i}.org.') for i in range(500)]
+    assert len(Zone.import_from_powerdns(zones, batch_size=500).added) == 500
+
+
+@pytest.mark.django_db()
+def test_zone_approximate_count():
+    Zone.import_from_powerdns(['example.com.', 'example.org.'])
+    assert Zone.approximate_count() == 2
+
+    Zone.objects.create(name='example.net.')
+    assert Zone.approximate_count() == 2  # cached
+
+    Zone.import_from_powerdns(['example.com.'])
+    assert Zone.approximate_count() == 1
@@ -0,0 +1 @@
+default_app_config = 'dino.tenants.apps.TenantsConfig'
@@ -0,0 +1,114 @@
+import threading
+import time
+from collections import namedtuple
+
+from django.core.cache import cache
+from django.db.models import CharField, Value
+
+from dino.common.cachestats import cache_stats
+from dino.tenants.models import Membership, PermissionLevels, ZoneAccess
+
+
+class AccessMap(namedtuple('AccessMap', 'zones admin_zones is_any_admin')):
+    """
+    what a user may access through tenant memberships: the names of all
+    zones of their tenants, of those zones of tenants they administrate, and
+    whether they administrate any tenant at all.
+    """
+
+    __slots__ = ()
+
+    @classmethod
+    def load(cls, user):
+        zones = set()
+        admin_zones = set()
+        is_any_admin = False
+
+        # the user's ZoneAccess rows, plus a row without zone for each tenant
+        # the user administrates, which may have no zones (yet). Annotations
+        # come after fields in unions, hence level first.
+        rows = ZoneAccess.objects.filter(user=user).values_list('level', 'zone').union(
+            Membership.objects.filter(user=user, level=PermissionLevels.ADMIN)
+            .annotate(no_zone=Value(None, output_field=CharField()))
+            .values_list('level', 'no_zone'),
+            all=True,
+        )
+
+        for level, zone in rows:
+            is_admin = level == PermissionLevels.ADMIN
+            is_any_admin = is_any_admin or is_admin
+            if zone is not None:
+                zones.add(zone)
+                if is_admin:
+                    admin_zones.add(zone)
+
+        return cls(frozenset(zones), frozenset(admin_zones), is_any_admin)
+
+
+class AccessCache():
+    """
+    AccessMaps of all users in the default cache, shared by all processes.
+
+    Entries are keyed by the ACL generation, which is bumped whenever
+    memberships, tenants or their zones change (see signals.py). Entries of
+    older generations are thus never read again and simply expire, instead
+    of having to find and delete those of every affected user.
+    """
+
+    GENERATION_KEY = 'dino:acl:generation'
+    timeout = 3600
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _initial_generation(self):
+        # if the generation got evicted, it must not start over at a value
+        # whose entries may still exist.
+        return int(time.time() * 1000)
+
+    def generation(self):
+        return cache.get_or_set(self.GENERATION_KEY, self._initial_generation, timeout=None)
+
+    def bump(self):
+        try:
+            cache.incr(self.GENERATION_KEY)
+        except ValueError:
+            cache.add(self.GENERATION_KEY, self._initial_generation(), timeout=None)
+
+    def get(self, user):
+        key = f'dino:acl:{self.generation()}:{user.pk}'
+        access = cache.get(key)
+
+        with self._lock:
+            if access is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+
+        if access is None:
+            access = AccessMap.load(user)
+            cache.set(key, access, self.timeout)
+
+        return access
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / total if total else None,
+            }
+
+
+access_cache = AccessCache()
+cache_stats.register('access cache', access_cache.stats)
+
+
+def get_access_map(user):
+    """ the AccessMap of user, loaded once per user object (i.e. request) """
+    if not hasattr(user, '_access_map'):
+        user._access_map = access_cache.get(user)
+    return user._access_map
@@ -2,4 +2,7 @@ from django.apps import AppConfig
 
 
 class TenantsConfig(AppConfig):
-    name = 'tenants'
+    name = 'dino.tenants'
+
+    def ready(self):
+        from . import signals  # noqa
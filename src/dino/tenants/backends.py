@@ -0,0 +1,23 @@
+from rules.permissions import ObjectPermissionBackend
+
+
+class MemoizedPermissionBackend(ObjectPermissionBackend):
+    """
+    rules' ObjectPermissionBackend, remembering results on the user object
+    like django's ModelBackend does with _perm_cache. Users are loaded for
+    every request, so results live as long as the request does: checking a
+    permission for each row of a page evaluates its predicates once.
+
+    Zones and zone names are the same object to check permissions for.
+    """
+
+    def has_perm(self, user, perm, obj=None):
+        if not hasattr(user, '_rules_perm_cache'):
+            user._rules_perm_cache = {}
+
+        key = (perm, getattr(obj, 'pk', obj))
+        try:
+            return user._rules_perm_cache[key]
+        except KeyError:
+            result = user._rules_perm_cache[key] = super().has_perm(user, perm, obj)
+            return result
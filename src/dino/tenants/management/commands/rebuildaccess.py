@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from dino.tenants.access import access_cache
+from dino.tenants.models import ZoneAccess
+
+
+class Command(BaseCommand):
+    help = 'Recompute which users may access which zones from tenant memberships'
+
+    def handle(self, *args, **options):
+        ZoneAccess.rebuild()
+        access_cache.bump()
+        self.stdout.write(f'{ZoneAccess.objects.count()} zone access entries.')
@@ -0,0 +1,52 @@
+# Generated by Django 2.2.28 on 2026-10-17 06:43
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def rebuild_zone_access(apps, schema_editor):
+    # like ZoneAccess.rebuild(), which can not be used in migrations
+    Membership = apps.get_model('tenants', 'Membership')
+    ZoneAccess = apps.get_model('tenants', 'ZoneAccess')
+
+    levels = {}
+    memberships = Membership.objects.filter(tenant__zones__isnull=False)
+    for user_id, zone, level in memberships.values_list('user_id', 'tenant__zones', 'level'):
+        if levels.get((user_id, zone)) != 'ADMIN':
+            levels[user_id, zone] = level
+
+    ZoneAccess.objects.bulk_create(
+        [ZoneAccess(user_id=user_id, zone_id=zone, level=level) for (user_id, zone), level in levels.items()],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('synczones', '0005_record'),
+        ('tenants', '0003_membership_level'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ZoneAccess',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('level', models.CharField(choices=[('ADMIN', 'Admin'), ('USER', 'User')], max_length=16)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='zone_access', to=settings.AUTH_USER_MODEL)),
+                ('zone', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='access', to='synczones.Zone')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='zoneaccess',
+            index=models.Index(fields=['user', 'zone', 'level'], name='tenants_zoneaccess_covering'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='zoneaccess',
+            unique_together={('user', 'zone')},
+        ),
+        migrations.RunPython(rebuild_zone_access, migrations.RunPython.noop),
+    ]
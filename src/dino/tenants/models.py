@@ -1,5 +1,5 @@
 from django.contrib.auth import get_user_model
-from django.db import models
+from django.db import models, transaction
 
 
 class PermissionLevels():
@@ -32,3 +32,47 @@ class Tenant(models.Model):
 
     def __str__(self):
         return f'Tenant {self.name}'
+
+
+class ZoneAccess(models.Model):
+    """
+    The zones each user may access through their tenants, with the highest
+    level of their memberships. Derived from Membership and Tenant.zones and
+    kept up to date by signals (see signals.py), so listing zones and
+    checking permissions need no joins over tenants.
+    """
+
+    user = models.ForeignKey(get_user_model(), on_delete=models.CASCADE, related_name='zone_access')
+    zone = models.ForeignKey('synczones.Zone', on_delete=models.CASCADE, related_name='access')
+    # a CharField, as some databases can not index TextFields
+    level = models.CharField(choices=PermissionLevels.choices, max_length=16)
+
+    class Meta:
+        unique_together = ('user', 'zone')
+        indexes = [
+            # covers permission checks, which read zone and level by user
+            models.Index(fields=['user', 'zone', 'level'], name='tenants_zoneaccess_covering'),
+        ]
+
+    def __str__(self):
+        return f'Access of user {self.user_id} to zone {self.zone_id}: {self.level}'
+
+    @classmethod
+    def rebuild(cls, users=None):
+        """ recompute the rows of users (user objects or ids), or of all users if None """
+        memberships = Membership.objects.filter(tenant__zones__isnull=False)
+        if users is not None:
+            memberships = memberships.filter(user__in=users)
+
+        levels = {}
+        for user_id, zone, level in memberships.values_list('user_id', 'tenant__zones', 'level'):
+            if levels.get((user_id, zone)) != PermissionLevels.ADMIN:
+                levels[user_id, zone] = level
+
+        with transaction.atomic():
+            rows = cls.objects.all() if users is None else cls.objects.filter(user__in=users)
+            rows.delete()
+            cls.objects.bulk_create(
+                [cls(user_id=user_id, zone_id=zone, level=level) for (user_id, zone), level in levels.items()],
+                batch_size=500,
+            )
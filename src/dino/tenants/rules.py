@@ -1,34 +1,28 @@
 import rules
 
-from dino.synczones.models import Zone
-from dino.tenants.models import Membership, PermissionLevels
+from dino.tenants.access import get_access_map
+
+
+def _zone_name(zone):
+    return zone if isinstance(zone, str) else zone.pk
 
 
 @rules.predicate
 def is_zone_tenant_member(user, zone):
-    if isinstance(zone, str):
-        zone = Zone.objects.get(pk=zone)
-
-    return zone.tenants.filter(users=user).exists()
+    return _zone_name(zone) in get_access_map(user).zones
 
 
 @rules.predicate
 def is_zone_tenant_admin(user, zone):
     if not zone:
         return is_any_tenant_admin(user)
-    if isinstance(zone, str):
-        zone = Zone.objects.get(pk=zone)
 
-    return Membership.objects.filter(
-        user=user,
-        level=PermissionLevels.ADMIN,
-        tenant__in=zone.tenants.all(),
-    ).exists()
+    return _zone_name(zone) in get_access_map(user).admin_zones
 
 
 @rules.predicate
 def is_any_tenant_admin(user):
-    return Membership.objects.filter(user=user, level=PermissionLevels.ADMIN).exists()
+    return get_access_map(user).is_any_admin
 
 
 is_zone_tenant_member = rules.is_authenticated & is_zone_tenant_member
@@ -0,0 +1,58 @@
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from dino.synczones.models import Zone
+
+from .access import access_cache
+from .models import Membership, Tenant, ZoneAccess
+
+
+def _tenant_users(tenants):
+    return list(Membership.objects.filter(tenant__in=tenants).values_list('user_id', flat=True).distinct())
+
+
+def _access_changed(users=None):
+    """ update ZoneAccess of users (None: nothing to update) and drop cached AccessMaps """
+    if users is not None:
+        ZoneAccess.rebuild(users=users)
+
+    # other processes may load the old state again until it is committed
+    access_cache.bump()
+    transaction.on_commit(access_cache.bump)
+
+
+@receiver(post_save, sender=Membership)
+@receiver(post_delete, sender=Membership)
+def update_membership_access(sender, instance, **kwargs):
+    _access_changed(users=[instance.user_id])
+
+
+@receiver(m2m_changed, sender=Tenant.users.through)
+def update_tenant_users_access(sender, instance, action, reverse, pk_set, **kwargs):
+    # tenant.users.add() etc. create memberships without saving them one by one
+    if action == 'pre_clear':
+        instance._access_users = [instance.pk] if reverse else _tenant_users([instance])
+    elif action == 'post_clear':
+        _access_changed(users=instance._access_users)
+    elif action in ('post_add', 'post_remove'):
+        _access_changed(users=[instance.pk] if reverse else pk_set)
+
+
+@receiver(m2m_changed, sender=Tenant.zones.through)
+def update_tenant_zones_access(sender, instance, action, reverse, pk_set, **kwargs):
+    # instance is a zone for zone.tenants.add() etc., pk_set then has tenants
+    if action == 'pre_clear':
+        instance._access_users = _tenant_users(instance.tenants.all() if reverse else [instance])
+    elif action == 'post_clear':
+        _access_changed(users=instance._access_users)
+    elif action in ('post_add', 'post_remove'):
+        _access_changed(users=_tenant_users(pk_set if reverse else [instance]))
+
+
+@receiver(post_delete, sender=Tenant)
+@receiver(post_delete, sender=Zone)
+def drop_access(sender, instance, **kwargs):
+    # the rows of ZoneAccess are deleted along with tenants and zones, but
+    # cached AccessMaps would still contain their zones.
+    _access_changed()
@@ -0,0 +1,88 @@
+import pytest
+from django.core.cache import cache
+
+from dino.common.cachestats import cache_stats
+from dino.synczones.models import Zone
+
+from ...access import AccessCache, AccessMap, access_cache, get_access_map
+from ...models import Membership, PermissionLevels, Tenant
+
+
+@pytest.mark.django_db()
+def test_access_map_user(user_tenant_user):
+    assert AccessMap.load(user_tenant_user) == AccessMap(frozenset({'example.com.'}), frozenset(), False)
+
+
+@pytest.mark.django_db()
+def test_access_map_admin(user_tenant_admin, other_tenant):
+    other_tenant.users.add(user_tenant_admin, through_defaults={'level': PermissionLevels.USER})
+    other_tenant.zones.add(Zone.objects.create(name='example.net.'))
+
+    access = AccessMap.load(user_tenant_admin)
+    assert access.zones == {'example.com.', 'example.net.'}
+    assert access.admin_zones == {'example.com.'}
+    assert access.is_any_admin
+
+
+@pytest.mark.django_db()
+def test_access_map_admin_without_zones(user_no_tenant):
+    tenant = Tenant.objects.create(name='empty')
+    tenant.users.add(user_no_tenant, through_defaults={'level': PermissionLevels.ADMIN})
+    assert AccessMap.load(user_no_tenant) == AccessMap(frozenset(), frozenset(), True)
+
+
+@pytest.mark.django_db()
+def test_access_map_no_tenant(user_no_tenant, django_assert_num_queries):
+    with django_assert_num_queries(1):
+        assert get_access_map(user_no_tenant) == AccessMap(frozenset(), frozenset(), False)
+        get_access_map(user_no_tenant)
+
+
+@pytest.mark.django_db()
+def test_access_cache_shared(user_tenant_user, django_user_model, django_assert_num_queries):
+    get_access_map(user_tenant_user)
+
+    # another request (or process) loads the user anew
+    user = django_user_model.objects.get(pk=user_tenant_user.pk)
+    with django_assert_num_queries(0):
+        assert get_access_map(user).zones == {'example.com.'}
+
+
+@pytest.mark.django_db()
+def test_access_cache_membership_changed(user_tenant_user, tenant, django_user_model):
+    get_access_map(user_tenant_user)
+    generation = access_cache.generation()
+
+    Membership.objects.filter(user=user_tenant_user).get().delete()
+    assert access_cache.generation() > generation
+
+    user = django_user_model.objects.get(pk=user_tenant_user.pk)
+    assert get_access_map(user).zones == set()
+
+
+@pytest.mark.django_db()
+def test_access_cache_zones_changed(user_tenant_user, tenant, db_zone, django_user_model):
+    get_access_map(user_tenant_user)
+    db_zone.delete()
+
+    user = django_user_model.objects.get(pk=user_tenant_user.pk)
+    assert get_access_map(user).zones == set()
+
+
+def test_access_cache_generation_evicted():
+    generation = access_cache.generation()
+    cache.delete(AccessCache.GENERATION_KEY)
+    access_cache.bump()
+    assert access_cache.generation() >= generation
+
+
+@pytest.mark.django_db()
+def test_access_cache_stats(user_tenant_user, django_user_model):
+    stats = AccessCache()
+    stats.get(user_tenant_user)
+    stats.get(user_tenant_user)
+    assert stats.stats() == {'hits': 1, 'misses': 1, 'hit_rate': 0.5}
+
+
+def test_access_cache_stats_logged():
+    assert cache_stats.collect()['access cache'] == access_cache.stats()
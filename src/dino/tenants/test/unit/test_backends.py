@@ -0,0 +1,25 @@
+import pytest
+
+from dino.synczones.models import Zone
+
+
+@pytest.mark.django_db()
+def test_memoized_permissions(user_tenant_user, django_assert_num_queries):
+    assert user_tenant_user.has_perm('tenants.edit_record', 'example.com.')
+
+    with django_assert_num_queries(0):
+        assert user_tenant_user.has_perm('tenants.edit_record', 'example.com.')
+        assert user_tenant_user.has_perm('tenants.edit_record', Zone(name='example.com.'))
+
+
+@pytest.mark.django_db()
+def test_memoized_permissions_per_object(user_tenant_user):
+    assert user_tenant_user.has_perm('tenants.edit_record', 'example.com.')
+    assert not user_tenant_user.has_perm('tenants.edit_record', 'example.org.')
+    assert not user_tenant_user.has_perm('tenants.delete_zone', 'example.com.')
+
+
+@pytest.mark.django_db()
+def test_memoized_permissions_per_user(user_tenant_user, user_no_tenant):
+    assert user_tenant_user.has_perm('tenants.view_zone', 'example.com.')
+    assert not user_no_tenant.has_perm('tenants.view_zone', 'example.com.')
@@ -0,0 +1,89 @@
+import pytest
+from django.core.management import call_command
+
+from dino.synczones.models import Zone
+
+from ...models import Membership, PermissionLevels, Tenant, ZoneAccess
+
+
+def access():
+    return set(ZoneAccess.objects.values_list('user__username', 'zone', 'level'))
+
+
+@pytest.mark.django_db()
+def test_zone_access_membership(user_tenant_user, tenant):
+    assert access() == {('tenanteduser', 'example.com.', PermissionLevels.USER)}
+
+    membership = Membership.objects.get(user=user_tenant_user, tenant=tenant)
+    membership.level = PermissionLevels.ADMIN
+    membership.save()
+    assert access() == {('tenanteduser', 'example.com.', PermissionLevels.ADMIN)}
+
+    membership.delete()
+    assert access() == set()
+
+
+@pytest.mark.django_db()
+def test_zone_access_tenant_users(user_no_tenant, tenant):
+    tenant.users.add(user_no_tenant, through_defaults={'level': PermissionLevels.USER})
+    assert access() == {('user', 'example.com.', PermissionLevels.USER)}
+
+    tenant.users.remove(user_no_tenant)
+    assert access() == set()
+
+    user_no_tenant.tenants.add(tenant, through_defaults={'level': PermissionLevels.USER})
+    assert access() == {('user', 'example.com.', PermissionLevels.USER)}
+
+    tenant.users.clear()
+    assert access() == set()
+
+
+@pytest.mark.django_db()
+def test_zone_access_tenant_zones(user_tenant_user, tenant):
+    zone = Zone.objects.create(name='example.net.')
+
+    tenant.zones.add(zone)
+    assert ('tenanteduser', 'example.net.', PermissionLevels.USER) in access()
+
+    tenant.zones.remove(zone)
+    zone.tenants.add(tenant)
+    assert ('tenanteduser', 'example.net.', PermissionLevels.USER) in access()
+
+    zone.tenants.clear()
+    assert access() == {('tenanteduser', 'example.com.', PermissionLevels.USER)}
+
+    tenant.zones.clear()
+    assert access() == set()
+
+
+@pytest.mark.django_db()
+def test_zone_access_highest_level(user_tenant_user, db_zone):
+    other = Tenant.objects.create(name='other')
+    other.zones.add(db_zone)
+    other.users.add(user_tenant_user, through_defaults={'level': PermissionLevels.ADMIN})
+    assert access() == {('tenanteduser', 'example.com.', PermissionLevels.ADMIN)}
+
+
+@pytest.mark.django_db()
+def test_zone_access_deleted(user_tenant_user, tenant, db_zone):
+    tenant.delete()
+    assert access() == set()
+
+
+@pytest.mark.django_db()
+def test_rebuildaccess(user_tenant_user, user_tenant_admin_other):
+    ZoneAccess.objects.all().delete()
+    ZoneAccess.objects.create(user=user_tenant_user, zone_id='example.org.', level=PermissionLevels.ADMIN)
+
+    call_command('rebuildaccess')
+    assert access() == {
+        ('tenanteduser', 'example.com.', PermissionLevels.USER),
+        ('otheradmin', 'example.com.', PermissionLevels.ADMIN),
+    }
+
+
+@pytest.fixture
+def user_tenant_admin_other(tenant, django_user_model):
+    user = django_user_model.objects.create(username='otheradmin')
+    tenant.users.add(user, through_defaults={'level': PermissionLevels.ADMIN})
+    return user
@@ -1,9 +1,13 @@
 import os
+import tempfile
 
 os.environ['DINO_SECRET_KEY'] = 'secret'
 os.environ['DINO_PDNS_APIKEY'] = ''
 os.environ['DINO_PDNS_APIURL'] = 'http://example.org'
 os.environ['DINO_ALLOWED_HOSTS'] = '*'
 os.environ['DINO_DEBUG'] = 'False'
+os.environ['DINO_CACHE_URL'] = 'locmem://'
+os.environ['DINO_LOCK_DIR'] = os.path.join(tempfile.gettempdir(), 'dino-test-locks')
+os.environ['DINO_ZONE_FILE_CACHE_SIZE'] = '0'
 
 from .settings import *  # noqa
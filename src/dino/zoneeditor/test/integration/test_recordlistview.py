@@ -5,6 +5,8 @@ from bs4 import BeautifulSoup
 from django.shortcuts import reverse
 from django.test import TestCase
 
+from dino.common.paginator import WindowPaginator
+
 
 @pytest.mark.parametrize('client', [
     (pytest.lazy_fixture('client_admin')),
@@ -108,6 +110,34 @@ def test_recordlistview_pagination_page(client_admin, mock_pdns_get_records):
     assert response.context_data['object_list'][-1]['name'] == 'r97.example.com.'
 
 
+@pytest.mark.django_db()
+def test_recordlistview_pagination_once(client_admin, mock_pdns_get_records, mocker):
+    from dino.pdns_api.zonestore import ZoneStore
+    paginator = mocker.patch('dino.zoneeditor.views.WindowPaginator', wraps=WindowPaginator)
+    record = mocker.spy(ZoneStore, '_record')
+
+    response = client_admin.get(reverse('zoneeditor:zone_records', kwargs={'zone': 'example.com.'}) + '?page=2')
+    assert response.status_code == 200
+    paginator.assert_called_once()
+    # only the records of the page are created
+    assert record.call_count == 20
+
+
+@pytest.mark.django_db()
+def test_recordlistview_permission_queries(client_user_tenant_user, mock_pdns_get_records, django_assert_max_num_queries):
+    # session, user and the zones the user may access, whatever the rows
+    with django_assert_max_num_queries(3):
+        response = client_user_tenant_user.get(reverse('zoneeditor:zone_records', kwargs={'zone': 'example.com.'}))
+    assert response.status_code == 200
+
+
+@pytest.mark.parametrize('page', ['0', '1000', 'x'])
+@pytest.mark.django_db()
+def test_recordlistview_pagination_invalid(client_admin, mock_pdns_get_records, page):
+    response = client_admin.get(reverse('zoneeditor:zone_records', kwargs={'zone': 'example.com.'}) + f'?page={page}')
+    assert response.status_code == 404
+
+
 @pytest.mark.parametrize('q,count,name', [
     ('r170', 1, 'r170.example.com.'),
     ('R170', 1, 'r170.example.com.'),
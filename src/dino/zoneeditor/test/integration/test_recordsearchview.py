@@ -0,0 +1,54 @@
+import pytest
+from django.shortcuts import reverse
+
+from dino.synczones.models import Record
+
+
+@pytest.fixture
+def records(db_zone):
+    for zone in ('example.com.', 'example.org.'):
+        Record.replace_rrset(zone, f'www.{zone}', 'A', 300, ['192.0.2.10'])
+        Record.replace_rrset(zone, f'mail.{zone}', 'A', 300, ['192.0.2.11'])
+
+
+def search(client, q):
+    response = client.get(reverse('zoneeditor:record_search') + f'?q={q}')
+    assert response.status_code == 200
+    return sorted((r.zone_id, r.name) for r in response.context['object_list'])
+
+
+@pytest.mark.django_db()
+def test_recordsearchview_admin(client_admin, records):
+    assert search(client_admin, '192.0.2.10') == [
+        ('example.com.', 'www.example.com.'),
+        ('example.org.', 'www.example.org.'),
+    ]
+
+
+@pytest.mark.django_db()
+def test_recordsearchview_empty(client_admin, records):
+    assert search(client_admin, '') == []
+
+
+@pytest.mark.django_db()
+def test_recordsearchview_tenant(client_user_tenant_user, records, other_tenant, user_tenant_user):
+    # zone in several of the user's tenants must be listed once only
+    other_tenant.users.add(user_tenant_user)
+    other_tenant.zones.add('example.com.')
+    assert search(client_user_tenant_user, '192.0.2.1*') == [
+        ('example.com.', 'mail.example.com.'),
+        ('example.com.', 'www.example.com.'),
+    ]
+
+
+@pytest.mark.django_db()
+def test_recordsearchview_user_no_tenant(client_user_no_tenant, records):
+    assert search(client_user_no_tenant, '192.0.2.10') == []
+
+
+@pytest.mark.django_db()
+def test_recordsearchview_content(client_admin, records):
+    response = client_admin.get(reverse('zoneeditor:record_search') + '?q=192.0.2.10')
+    content = response.content.decode()
+    assert 'www.example.org.' in content
+    assert 'mail.example.org.' not in content
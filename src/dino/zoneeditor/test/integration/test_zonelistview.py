@@ -1,8 +1,12 @@
+import datetime
+
 import pytest
+from bs4 import BeautifulSoup
 from django.shortcuts import reverse
 from django.test import TestCase
+from django.utils import timezone
 
-from dino.synczones.models import Zone
+from dino.synczones.models import SyncStatus, Zone
 
 
 @pytest.mark.django_db()
@@ -24,6 +28,25 @@ def test_zonelistview_sync(client_admin, mock_pdns_get_zones):
     assert Zone.objects.filter(name='example.com.').exists()
 
 
+@pytest.mark.django_db()
+def test_zonelistview_no_sync_after_first(client_admin, mock_pdns_get_zones):
+    client_admin.get(reverse('zoneeditor:zone_list'))
+    response = client_admin.get(reverse('zoneeditor:zone_list'))
+    assert response.status_code == 200
+    mock_pdns_get_zones.assert_called_once()
+
+
+@pytest.mark.django_db()
+def test_zonelistview_last_sync(client_admin, mock_pdns_get_zones):
+    status = SyncStatus.get()
+    status.last_sync = timezone.now() - datetime.timedelta(hours=3)
+    status.save()
+    response = client_admin.get(reverse('zoneeditor:zone_list'))
+    assert response.context['last_sync'] == status.last_sync
+    assert '3\xa0hours ago' in response.content.decode()
+    mock_pdns_get_zones.assert_not_called()
+
+
 @pytest.mark.django_db()
 def test_zonelistview_filter(client_admin, mock_pdns_get_zones):
     response = client_admin.get(reverse('zoneeditor:zone_list') + '?q=xample.org.')
@@ -60,6 +83,15 @@ def test_zonelistview_user_tenant_admin(client_user_tenant_admin, mock_pdns_get_
     assert 'example16.org' not in content
 
 
+@pytest.mark.django_db()
+def test_zonelistview_user_several_tenants(client_user_tenant_admin, user_tenant_admin, other_tenant, db_zone, mock_pdns_get_zones):
+    # the zone is listed once, even if the user may access it through two tenants
+    other_tenant.zones.add(db_zone)
+    other_tenant.users.add(user_tenant_admin)
+    response = client_user_tenant_admin.get(reverse('zoneeditor:zone_list'))
+    assert [zone.name for zone in response.context_data['object_list']] == ['example.com.']
+
+
 @pytest.mark.django_db()
 def test_zonelistview_user_no_tenant(client_user_no_tenant, mock_pdns_get_zones):
     response = client_user_no_tenant.get(reverse('zoneeditor:zone_list'))
@@ -68,3 +100,81 @@ def test_zonelistview_user_no_tenant(client_user_no_tenant, mock_pdns_get_zones)
     assert 'example.com.' not in content
     assert 'example.org.' not in content
     assert 'example16.org' not in content
+
+
+@pytest.mark.django_db()
+def test_zonelistview_sort(client_admin):
+    SyncStatus.objects.create(pk=1, last_sync=timezone.now())
+    Zone.objects.create(name='a.example.', kind='Native', serial=3, record_count=10)
+    Zone.objects.create(name='b.example.', kind='Master', serial=2, record_count=None)
+    Zone.objects.create(name='c.example.', kind='Slave', serial=1, record_count=5)
+
+    def names(sort):
+        response = client_admin.get(reverse('zoneeditor:zone_list') + f'?sort={sort}&page=1')
+        assert response.status_code == 200
+        return [zone.name for zone in response.context['object_list']]
+
+    assert names('kind') == ['b.example.', 'a.example.', 'c.example.']
+    assert names('-serial') == ['a.example.', 'b.example.', 'c.example.']
+    assert names('serial') == ['c.example.', 'b.example.', 'a.example.']
+    assert names('invalid') == ['a.example.', 'b.example.', 'c.example.']
+
+
+@pytest.mark.django_db()
+def test_zonelistview_sort_urls(client_admin):
+    SyncStatus.objects.create(pk=1, last_sync=timezone.now())
+    response = client_admin.get(reverse('zoneeditor:zone_list') + '?sort=kind&q=example&page=1')
+    assert response.context['sort_urls']['kind'] == '?sort=-kind&q=example'
+    assert response.context['sort_urls']['serial'] == '?sort=serial&q=example'
+
+
+@pytest.mark.django_db()
+def test_zonelistview_cursor_pagination(client_admin):
+    SyncStatus.objects.create(pk=1, last_sync=timezone.now())
+    Zone.objects.bulk_create([Zone(name=f'zone{i:02}.example.') for i in range(45)])
+    url = reverse('zoneeditor:zone_list')
+
+    response = client_admin.get(url + '?sort=name')
+    page = response.context['page_obj']
+    assert [z.name for z in page][0] == 'zone00.example.'
+    assert not page.has_previous()
+
+    response = client_admin.get(url + f'?sort=name&after={page.next_cursor}')
+    page = response.context['page_obj']
+    assert [z.name for z in page] == [f'zone{i:02}.example.' for i in range(20, 40)]
+
+    # links keep the other parameters and drop the opposite cursor
+    soup = BeautifulSoup(response.content, 'html.parser')
+    previous_url = soup.select('a[aria-label="Previous page"]')[0]['href']
+    assert 'sort=name' in previous_url and 'after=' not in previous_url
+
+    response = client_admin.get(url + previous_url)
+    assert [z.name for z in response.context['page_obj']][-1] == 'zone19.example.'
+
+
+@pytest.mark.django_db()
+def test_zonelistview_cursor_invalid(client_admin):
+    SyncStatus.objects.create(pk=1, last_sync=timezone.now())
+    response = client_admin.get(reverse('zoneeditor:zone_list') + '?after=invalid')
+    assert response.status_code == 404
+
+
+@pytest.mark.django_db()
+def test_zonelistview_count(client_admin, django_assert_num_queries):
+    SyncStatus.objects.create(pk=1, last_sync=timezone.now())
+    Zone.objects.bulk_create([Zone(name=f'zone{i:02}.example.') for i in range(45)])
+
+    response = client_admin.get(reverse('zoneeditor:zone_list'))
+    assert response.context['page_obj'].count == 45
+    assert '45 zones.' in response.content.decode()
+
+    # the count is cached, pages are read without COUNT(*)
+    with django_assert_num_queries(4) as queries:
+        client_admin.get(reverse('zoneeditor:zone_list'))
+    assert not any('COUNT(' in q['sql'] for q in queries.captured_queries)
+
+
+@pytest.mark.django_db()
+def test_zonelistview_count_tenant(client_user_tenant_admin, mock_pdns_get_zones):
+    response = client_user_tenant_admin.get(reverse('zoneeditor:zone_list'))
+    assert response.context['page_obj'].count == 1
@@ -21,6 +21,7 @@ urlpatterns = [
     path('', RedirectView.as_view(pattern_name='zoneeditor:zone_list', permanent=False), name="index"),
     path('zones', views.ZoneListView.as_view(), name="zone_list"),
     path('zones/create', views.ZoneCreateView.as_view(), name="zone_create"),
+    path('records', views.RecordSearchView.as_view(), name="record_search"),
     path('zones/delete', views.ZoneDeleteView.as_view(), name="zone_delete"),
     path('zones/<zonename:zone>', RedirectView.as_view(pattern_name='zoneeditor:zone_records', permanent=False), name="zone_detail"),
     path('zones/<zonename:zone>/', include([
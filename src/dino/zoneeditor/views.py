@@ -3,7 +3,7 @@ from django.conf import settings
 from django.contrib.messages.views import SuccessMessageMixin
 from django.core import signing
 from django.core.exceptions import PermissionDenied, SuspiciousOperation
-from django.core.paginator import Paginator
+from django.core.paginator import InvalidPage
 from django.core.validators import RegexValidator, URLValidator
 from django.http import Http404, HttpResponseNotAllowed, HttpResponseRedirect
 from django.urls import reverse, reverse_lazy
@@ -15,9 +15,12 @@ from django.views.generic.list import ListView
 from rules.contrib.views import PermissionRequiredMixin
 
 from dino.common.fields import SignedHiddenField
+from dino.common.paginator import CursorPaginator, WindowPaginator
 from dino.common.views import DeleteConfirmView
 from dino.pdns_api import PDNSError, PDNSNotFoundException, pdns
-from dino.synczones.models import Zone
+from dino.synczones.models import Record, SyncStatus, Zone
+from dino.synczones.sync import sync_zones
+from dino.tenants.access import get_access_map
 from dino.tenants.models import PermissionLevels, Tenant
 
 
@@ -30,12 +33,11 @@ class ZoneListView(PermissionRequiredMixin, ListView):
     template_name = "zoneeditor/zone_list.html"
     model = Zone
     paginate_by = 20
-
-    def __init__(self, **kwargs):
-        self._zones_refreshed = False
-        return super().__init__(**kwargs)
+    sort_fields = ('name', 'kind', 'serial', 'record_count', 'last_changed')
 
     def get(self, request, *args, **kwargs):
+        self.last_sync = self._get_last_sync()
+
         if self.query:
             name = self.query.rstrip('.') + '.'
 
@@ -48,24 +50,61 @@ class ZoneListView(PermissionRequiredMixin, ListView):
     def query(self):
         return self.request.GET.get('q')
 
+    @property
+    def sort(self):
+        sort = self.request.GET.get('sort', 'name')
+        return sort if sort.lstrip('-') in self.sort_fields else 'name'
+
+    def _sort_url(self, field):
+        params = self.request.GET.copy()
+        params['sort'] = '-' + field if self.sort == field else field
+        for param in ('page', 'after', 'before'):
+            params.pop(param, None)
+        return '?' + params.urlencode()
+
+    def _approximate_count(self):
+        if self.query:
+            return None
+        if self.request.user.is_superuser:
+            return Zone.approximate_count()
+        return len(get_access_map(self.request.user).zones)
+
+    def paginate_queryset(self, queryset, page_size):
+        # cursors instead of page numbers: deep pages of many zones need
+        # neither COUNT(*) nor OFFSET.
+        paginator = CursorPaginator(queryset, self.sort, page_size, key='name', count=self._approximate_count())
+        try:
+            page = paginator.page(after=self.request.GET.get('after'), before=self.request.GET.get('before'))
+        except InvalidPage:
+            raise Http404()
+
+        return paginator, page, page.object_list, page.has_other_pages()
+
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context['search_form'] = SearchForm(initial={'q': self.query})
+        context['last_sync'] = self.last_sync
+        context['sort'] = self.sort
+        context['sort_urls'] = {field: self._sort_url(field) for field in self.sort_fields}
         return context
 
-    def _refresh_zones(self):
-        if not self._zones_refreshed:
-            # TODO: doing this every time the list is loaded is a bad idea
-            Zone.import_from_powerdns(pdns().get_zones())
-            self._zones_refreshed = True
+    def _get_last_sync(self):
+        status = SyncStatus.get()
 
-    def get_queryset(self):
-        self._refresh_zones()
+        if status.last_sync is None:
+            # zones are usually synced by the synczones command. It has not
+            # run yet, so do it once right away instead of showing no zones.
+            sync_zones(if_never_synced=True)
+            status.refresh_from_db()
 
-        zones = Zone.objects.all().order_by('name')
+        return status.last_sync
+
+    def get_queryset(self):
+        # ordered by the paginator
+        zones = Zone.objects.all()
 
         if not self.request.user.is_superuser:
-            zones = zones.filter(tenants__users=self.request.user)
+            zones = zones.filter(access__user=self.request.user)
 
         if self.query:
             zones = zones.filter(name__icontains=self.query)
@@ -73,6 +112,33 @@ class ZoneListView(PermissionRequiredMixin, ListView):
         return zones
 
 
+class RecordSearchView(PermissionRequiredMixin, ListView):
+    permission_required = 'tenants.list_zones'
+    template_name = "zoneeditor/record_search.html"
+    paginate_by = 20
+    paginator_class = WindowPaginator
+
+    @property
+    def query(self):
+        return self.request.GET.get('q', '').strip()
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['search_form'] = SearchForm(initial={'q': self.query})
+        return context
+
+    def get_queryset(self):
+        if not self.query:
+            return Record.objects.none()
+
+        records = Record.search(self.query).order_by('zone', 'name', 'rtype', 'content')
+
+        if not self.request.user.is_superuser:
+            records = records.filter(zone__access__user=self.request.user)
+
+        return records
+
+
 class ZoneNameValidator(RegexValidator):
     # identical to URLValidator.hostname_re, except for leading underscroes
     hostname_re = r'[_a-z' + URLValidator.ul + r'0-9](?:[a-z' + URLValidator.ul + r'0-9-]{0,61}[a-z' + URLValidator.ul + r'0-9])?'
@@ -185,13 +251,18 @@ class ZoneRecordsView(ZoneDetailMixin, TemplateView):
         context['paginator'] = self._paginator
         return context
 
-    @property
+    @cached_property
     def current_page(self):
-        return self._paginator.page(self.request.GET.get('page', 1))
+        try:
+            return self._paginator.page(self.request.GET.get('page', 1))
+        except InvalidPage:
+            raise Http404()
 
-    @property
+    @cached_property
     def _paginator(self):
-        return Paginator(self.filtered_records, self.paginate_by)
+        # records are a ZoneStore (or selection), which counts without
+        # iterating and creates only the records of the page sliced from it.
+        return WindowPaginator(self.filtered_records, self.paginate_by)
 
     @cached_property
     def filtered_records(self):
@@ -206,13 +277,12 @@ class ZoneRecordsView(ZoneDetailMixin, TemplateView):
             q = q.lower()
             is_apex_search = (q == '@')
 
-            return [
-                r for r in records
-                if
-                    q.upper() == r['rtype'] or
-                    q in r['name'].lower() or
-                    (is_apex_search and r['name'] == self.zone_name)
-            ]
+            return records.select(
+                lambda name, rtype:
+                    q.upper() == rtype or
+                    q in name.lower() or
+                    (is_apex_search and name == self.zone_name)
+            )
         else:
             return records
 
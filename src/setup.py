@@ -60,6 +60,12 @@ setup(
         'pgsql': [
             'psycopg2>=2.5.4',
         ],
+        'memcached': [
+            'python-memcached>=1.59',
+        ],
+        'redis': [
+            'django-redis>=4.10',
+        ],
         'dev': [
             'isort',
             'pylama',